@@ -0,0 +1,98 @@
+"""
+Keyword matching cost as the keyword list grows.
+
+Generates `--keywords` random project names plus a few real ones, a block of
+filler text (64 KB by default, about one OCR'd page set) with a keyword near
+the end, and times KeywordMatcher.best against the old substring loop.
+
+    python -m benchmarks.bench_keywords --keywords 500 5000 20000
+"""
+import argparse
+import json
+import random
+import string
+import time
+from pathlib import Path
+from src.keywords import KeywordMatcher
+
+REAL_KEYWORDS = ["Physics", "Finance", "Resume", "Invoice", "Project_Alpha"]
+
+
+def make_keywords(count: int, rng: random.Random) -> list:
+    words = set(REAL_KEYWORDS)
+    while len(words) < count:
+        length = rng.randint(5, 14)
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(length)).title())
+    # Real keywords last: the substring loop has to try every generated one first
+    return sorted(words - set(REAL_KEYWORDS)) + REAL_KEYWORDS
+
+
+def make_text(size: int, rng: random.Random) -> str:
+    vocab = ["the", "total", "amount", "due", "page", "report", "summary", "lorem", "ipsum",
+             "dolor", "account", "date", "reference", "quantity", "price", "notes"]
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocab)
+        words.append(word)
+        length += len(word) + 1
+    words.insert(len(words) - 20, "invoice")
+    return " ".join(words)
+
+
+def naive_best(keywords: list, text: str):
+    # What _detect_project_context did before the matcher
+    lowered = text.lower()
+    for keyword in keywords:
+        if keyword.lower() in lowered:
+            return keyword
+    return None
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(counts: list, text_size: int, repeat: int) -> dict:
+    rng = random.Random(42)
+    text = make_text(text_size, rng)
+    results = {}
+    for count in counts:
+        keywords = make_keywords(count, rng)
+        started = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_s = time.perf_counter() - started
+        assert matcher.best(text) == naive_best(keywords, text) == "Invoice"
+        results[count] = {
+            "build_s": build_s,
+            "matcher_s": _time(lambda: matcher.best(text), repeat),
+            "naive_s": _time(lambda: naive_best(keywords, text), repeat),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keywords", type=int, nargs="+", default=[5, 500, 5000])
+    parser.add_argument("--text-kb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.keywords, args.text_kb * 1024, args.repeat)
+    print(f"{'keywords':>9}{'build (ms)':>12}{'matcher (ms)':>14}{'naive (ms)':>12}{'speedup':>9}")
+    for count, r in results.items():
+        speedup = r["naive_s"] / max(r["matcher_s"], 1e-9)
+        print(f"{count:>9}{r['build_s'] * 1000:>12.1f}{r['matcher_s'] * 1000:>14.2f}"
+              f"{r['naive_s'] * 1000:>12.2f}{speedup:>8.1f}x")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Full-resolution OCR vs downscaled and progressive (banded, early-exit) OCR.
+
+Builds receipt-style fixtures like manual_test.py (white canvas, black text)
+at a few sizes and keyword positions, and OCRs each one three ways: the
+whole image at its own resolution in one call (the original behaviour), the
+downscaled grayscale image in one call (progressive=False), and progressive.
+Reports latency and whether the expected project keyword was found.
+
+    python -m benchmarks.bench_ocr --repeat 3 --json ocr_bench.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont
+from src.keywords import KeywordMatcher
+from src.ocr_engine import OCREngine, OCROptions, _init_worker, _recognize
+
+KEYWORDS = ["Physics", "Finance", "Resume", "Invoice", "Project_Alpha"]
+
+FILLER = "Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod"
+
+
+def _font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size=size)  # Pillow >= 10.1
+        except TypeError:
+            return ImageFont.load_default()
+
+
+def make_fixture(path: Path, size: tuple, keyword_line, lines: int, font_size: int):
+    """A page of filler text with the official Invoice line at `keyword_line` (None = nowhere)."""
+    img = Image.new('RGB', size, color=(255, 255, 255))
+    d = ImageDraw.Draw(img)
+    font = _font(font_size)
+    step = size[1] // (lines + 1)
+    for i in range(lines):
+        text = "This is an official Invoice for $500" if i == keyword_line else FILLER
+        d.text((font_size, step * i + font_size // 2), text, fill=(0, 0, 0), font=font)
+    img.save(path)
+
+
+FIXTURES = [
+    # name, size, keyword line, lines, font size, expected keyword
+    ("receipt_small", (400, 200), 0, 1, 14, "Invoice"),
+    ("a4_keyword_top", (2480, 3508), 1, 40, 48, "Invoice"),
+    ("a4_keyword_bottom", (2480, 3508), 38, 40, 48, "Invoice"),
+    ("a4_no_keyword", (2480, 3508), None, 40, 48, None),
+    ("photo_24mp_top", (6000, 4000), 0, 20, 120, "Invoice"),
+]
+
+
+def ocr_full_resolution(path: Path, stop_pattern=None) -> tuple:
+    """The baseline: no downscaling, no grayscale pass, one Tesseract call for the whole image."""
+    with Image.open(path) as image:
+        image.load()
+        return _recognize(image, "eng", 120).lower(), True
+
+
+def run(repeat: int) -> dict:
+    matcher = KeywordMatcher(KEYWORDS)
+    _init_worker("eng")  # Same Tesseract binding as the engines use inline
+    modes = {
+        "full": ocr_full_resolution,
+        "downscaled": OCREngine(workers=0, options=OCROptions(progressive=False, timeout=120)).image_to_text,
+        "progressive": OCREngine(workers=0, options=OCROptions(progressive=True, timeout=120)).image_to_text,
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, size, kw_line, lines, font_size, expected in FIXTURES:
+            path = Path(tmp) / f"{name}.png"
+            make_fixture(path, size, kw_line, lines, font_size)
+            results[name] = {}
+            for mode, ocr in modes.items():
+                timings = []
+                found = None
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    text, _ = ocr(path, stop_pattern=matcher.pattern)
+                    timings.append(time.perf_counter() - started)
+                    found = matcher.best(text)
+                results[name][mode] = {
+                    "median_s": round(statistics.median(timings), 4),
+                    "found": found,
+                    "correct": found == expected,
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"{'fixture':<20}{'full (s)':>10}{'down (s)':>10}{'prog (s)':>10}{'speedup':>9}"
+          f"  accuracy full/down/prog")
+    for name, modes in results.items():
+        full, down, prog = modes["full"], modes["downscaled"], modes["progressive"]
+        speedup = full["median_s"] / max(prog["median_s"], 1e-6)
+        accuracy = "/".join("ok" if m["correct"] else "MISS" for m in (full, down, prog))
+        print(f"{name:<20}{full['median_s']:>10.3f}{down['median_s']:>10.3f}{prog['median_s']:>10.3f}"
+              f"{speedup:>8.1f}x  {accuracy}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
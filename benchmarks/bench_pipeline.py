@@ -0,0 +1,190 @@
+"""
+Throughput and latency benchmark for the classify/move path and the watcher.
+
+1. move_file: generates a synthetic desktop and sorts it with FileCleaner,
+   timing each stage (probe, classify, move) per file.
+2. watcher: starts a DesktopWatcher on an empty folder, drops files into it
+   and measures the time from the end of each write to the file leaving the
+   root (i.e. being placed in its category folder).
+
+Results are written as JSON; pass --compare with an earlier result file to
+see the change per metric.
+
+    python -m benchmarks.bench_pipeline --files 500 --json run.json --compare last.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 3), "n": len(ordered)}
+
+
+def bench_move_file(workdir: Path, count: int, seed: int) -> dict:
+    from benchmarks.synthetic import generate_desktop
+    from src.cleaner import FileCleaner
+    from src.probe import FileProbe
+
+    root = workdir / "desktop"
+    files = generate_desktop(root, count, seed)
+    cleaner = FileCleaner(root)
+    stages = {"probe": [], "classify": [], "move": [], "total": []}
+
+    started = time.perf_counter()
+    for file_path in files:
+        t0 = time.perf_counter()
+        probe = FileProbe(file_path)
+        t1 = time.perf_counter()
+        category = cleaner.identify_category(file_path, probe)
+        t2 = time.perf_counter()
+        cleaner.place_file(file_path, category)
+        t3 = time.perf_counter()
+        stages["probe"].append(t1 - t0)
+        stages["classify"].append(t2 - t1)
+        stages["move"].append(t3 - t2)
+        stages["total"].append(t3 - t0)
+    elapsed = time.perf_counter() - started
+    cleaner.shutdown()
+
+    return {
+        "files": len(files),
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(len(files) / elapsed, 2) if elapsed else None,
+        "stages": {name: percentiles(samples) for name, samples in stages.items()},
+        "ocr_cache": cleaner.ocr_cache.stats(),
+    }
+
+
+def bench_watcher(workdir: Path, count: int, seed: int, timeout: float) -> dict:
+    from benchmarks.synthetic import MIX, write_file
+    from src.watcher import DesktopWatcher
+
+    root = workdir / "watched"
+    staging = workdir / "staging"
+    root.mkdir()
+    staging.mkdir()
+
+    rng = random.Random(seed)
+    kinds = rng.choices([k for k, _ in MIX], weights=[w for _, w in MIX], k=count)
+    # Build the files elsewhere so only the copy into the watched folder is timed
+    sources = [write_file(staging, kind, i, rng) for i, kind in enumerate(kinds)]
+
+    watcher = DesktopWatcher(root)
+    watcher.start()
+    written = {}
+    placed = {}
+    done = threading.Event()
+
+    def poll():
+        # A file counts as placed once it is no longer loose in the root
+        while not done.is_set():
+            with os.scandir(root) as entries:
+                present = {e.name for e in entries if e.is_file()}
+            now = time.perf_counter()
+            for name in list(written):
+                if name not in placed and name not in present:
+                    placed[name] = now
+            time.sleep(0.005)
+
+    poller = threading.Thread(target=poll, daemon=True)
+    poller.start()
+    try:
+        for source in sources:
+            target = root / source.name
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                dst.write(src.read())
+            written[target.name] = time.perf_counter()
+            time.sleep(rng.uniform(0, 0.02))  # Roughly download-like arrival
+
+        deadline = time.monotonic() + timeout
+        while len(placed) < len(written) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        pipeline = watcher.stats()
+    finally:
+        done.set()
+        poller.join()
+        watcher.stop()
+
+    latencies = [placed[n] - written[n] for n in placed]
+    return {
+        "files": len(written),
+        "placed": len(placed),
+        "write_to_placed": percentiles(latencies),
+        "pipeline": pipeline,
+    }
+
+
+def compare(current: dict, previous: dict, prefix: str = ""):
+    """Prints every numeric metric that exists in both runs with its relative change."""
+    for key, value in current.items():
+        name = f"{prefix}{key}"
+        old = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(value, dict):
+            compare(value, old or {}, name + ".")
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            change = (value - old) / old * 100
+            print(f"{name:<50}{old:>12}{value:>12}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Synthetic files for move_file")
+    parser.add_argument("--watcher-files", type=int, default=100, help="Files dropped on the watcher")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300, help="Give up waiting on the watcher after this")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the user's OCR cache instead of a fresh one")
+    parser.add_argument("--json", type=Path, default=Path("bench_pipeline.json"))
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result file to diff against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if not args.warm_cache:
+            os.environ["DESKTOP_CLEANER_HOME"] = str(workdir / "state")
+
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "seed": args.seed,
+                "warm_cache": args.warm_cache,
+            },
+            "move_file": bench_move_file(workdir, args.files, args.seed),
+            "watcher": bench_watcher(workdir, args.watcher_files, args.seed, args.timeout),
+        }
+
+    args.json.write_text(json.dumps(results, indent=2))
+    move, watch = results["move_file"], results["watcher"]
+    print(f"move_file: {move['files_per_sec']} files/s over {move['files']} files")
+    for stage, stats in move["stages"].items():
+        print(f"  {stage:<9} p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms")
+    lat = watch["write_to_placed"]
+    print(f"watcher: {watch['placed']}/{watch['files']} placed, "
+          f"write->placed p50 {lat.get('p50_ms')} ms  p95 {lat.get('p95_ms')} ms  p99 {lat.get('p99_ms')} ms")
+    print(f"Saved results to {args.json}")
+
+    if args.compare:
+        print(f"\n{'metric':<50}{'previous':>12}{'current':>12}{'change':>10}")
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Synthetic desktop generator for the benchmarks.
+
+Starts from manual_test.setup_sandbox (the five hand-made test files) and adds
+N more files of mixed types and sizes: text notes, JPEG photos, rendered-text
+PNG screenshots (some containing project keywords, for OCR), small PDFs, zip
+archives and opaque binaries.
+"""
+import io
+import random
+import zipfile
+from pathlib import Path
+from PIL import Image
+from benchmarks.bench_ocr import KEYWORDS, make_fixture
+from manual_test import setup_sandbox
+
+# Relative frequency of each kind of file on a "typical" messy desktop
+MIX = [
+    ("text", 25),
+    ("photo", 20),
+    ("screenshot", 20),
+    ("pdf", 15),
+    ("zip", 10),
+    ("binary", 10),
+]
+
+WORDS = "meeting notes budget draft final report lecture lab todo ideas summary".split()
+
+
+def _minimal_pdf(text: str) -> bytes:
+    """A one-page PDF with a real text layer, written by hand to avoid extra dependencies."""
+    stream = f"BT /F1 24 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _name(rng: random.Random, index: int, suffix: str, keyword_chance: float = 0.1) -> str:
+    stem = "_".join(rng.sample(WORDS, 2))
+    if rng.random() < keyword_chance:
+        stem = f"{rng.choice(KEYWORDS)}_{stem}"
+    return f"{stem}_{index:05d}{suffix}"
+
+
+def write_file(folder: Path, kind: str, index: int, rng: random.Random) -> Path:
+    """Creates one synthetic file of the given kind and returns its path."""
+    if kind == "text":
+        path = folder / _name(rng, index, ".txt")
+        path.write_text(" ".join(rng.choices(WORDS, k=rng.randint(10, 5000))))
+    elif kind == "photo":
+        path = folder / _name(rng, index, ".jpg")
+        size = rng.choice([(640, 480), (1920, 1080), (4000, 3000)])
+        Image.new("RGB", size, color=tuple(rng.randrange(256) for _ in range(3))).save(path, quality=85)
+    elif kind == "screenshot":
+        # Like TEST C in manual_test.py: real rendered text for Tesseract to read
+        path = folder / f"Screenshot_{index:05d}.png"
+        keyword_line = 0 if rng.random() < 0.5 else None
+        size = rng.choice([(400, 200), (1280, 800), (2560, 1600)])
+        make_fixture(path, size, keyword_line, lines=max(1, size[1] // 100),
+                     font_size=max(14, size[1] // 40))
+    elif kind == "pdf":
+        path = folder / _name(rng, index, ".pdf")
+        body = rng.choice(KEYWORDS) if rng.random() < 0.3 else " ".join(rng.sample(WORDS, 4))
+        path.write_bytes(_minimal_pdf(body))
+    elif kind == "zip":
+        path = folder / _name(rng, index, ".zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("readme.txt", " ".join(rng.choices(WORDS, k=200)))
+    else:
+        path = folder / _name(rng, index, ".bin", keyword_chance=0)
+        path.write_bytes(rng.randbytes(rng.choice([1024, 64 * 1024, 1024 * 1024])))
+    return path
+
+
+def generate_desktop(folder: Path, count: int, seed: int = 0) -> list:
+    """Builds the manual_test sandbox in `folder` plus `count` synthetic files."""
+    setup_sandbox(folder)
+    rng = random.Random(seed)
+    kinds = [k for k, _ in MIX]
+    weights = [w for _, w in MIX]
+    for index, kind in enumerate(rng.choices(kinds, weights=weights, k=count)):
+        write_file(folder, kind, index, rng)
+    return sorted(p for p in folder.iterdir() if p.is_file())
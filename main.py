@@ -1,11 +1,65 @@
+import subprocess
 import sys
-from PySide6.QtWidgets import QApplication
-from src.gui import MainWindow
+import time
+
+
+def profile_startup(top: int = 15):
+    """Times each start-up phase, then lists the slowest imports behind src.gui."""
+    phases = []
+    mark = time.perf_counter()
+
+    def lap(name):
+        nonlocal mark
+        now = time.perf_counter()
+        phases.append((name, now - mark))
+        mark = now
+
+    from PySide6.QtWidgets import QApplication
+    lap("import Qt")
+    from src.gui import MainWindow
+    lap("import src.gui")
+    app = QApplication(sys.argv)
+    lap("QApplication")
+    window = MainWindow()
+    lap("MainWindow()")
+    window.show()
+    app.processEvents()
+    lap("first paint")
+
+    print("--- Start-up phases ---")
+    for name, seconds in phases:
+        print(f"{seconds * 1000:>9.1f} ms  {name}")
+    print(f"{sum(s for _, s in phases) * 1000:>9.1f} ms  total")
+
+    # A fresh interpreter so the numbers are not hidden by modules already imported above
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.gui"],
+                            capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        imports.append((int(parts[1]), parts[2].strip()))
+    print("\n--- Slowest imports (cumulative) ---")
+    for micros, module in sorted(imports, reverse=True)[:top]:
+        print(f"{micros / 1000:>9.1f} ms  {module}")
+
+    window.close()
+    return 0
+
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        sys.exit(profile_startup())
+
+    from PySide6.QtWidgets import QApplication
+    from src.gui import MainWindow
+
     app = QApplication(sys.argv)
     
     window = MainWindow()
     window.show()
     
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
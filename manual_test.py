@@ -7,11 +7,11 @@ import time
 # 1. Setup the "Sandbox" (A fake Desktop)
 sandbox = Path.home() / "Desktop" / "Cleaner_Test_Zone"
 
-def setup_sandbox():
+def setup_sandbox(sandbox: Path = sandbox):
     """Creates a folder and fills it with dummy files for testing."""
     if sandbox.exists():
         shutil.rmtree(sandbox) # Wipes it clean to start fresh
-    sandbox.mkdir()
+    sandbox.mkdir(parents=True)
 
     print(f"Creating test files in: {sandbox}")
 
@@ -50,6 +50,7 @@ def run_test():
     
     for file in files_to_move:
         cleaner.move_file(file)
+    cleaner.shutdown()
 
     print("\n--- TEST COMPLETE ---")
     print(f"Go check the folder: {sandbox}")
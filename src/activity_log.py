@@ -0,0 +1,76 @@
+from collections import deque
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PySide6.QtWidgets import QAbstractItemView, QListView
+
+
+class LogModel(QAbstractListModel):
+    """Ring buffer of log lines: once full, the oldest line drops off the top."""
+
+    def __init__(self, capacity=2000, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._lines = deque()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._lines)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._lines[index.row()]
+        return None
+
+    def extend(self, messages):
+        messages = messages[-self.capacity:]
+        overflow = len(self._lines) + len(messages) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._lines.popleft()
+            self.endRemoveRows()
+
+        first = len(self._lines)
+        self.beginInsertRows(QModelIndex(), first, first + len(messages) - 1)
+        self._lines.extend(messages)
+        self.endInsertRows()
+
+
+class ActivityLog(QListView):
+    """
+    Activity log that stays fast under a flood of messages.
+
+    `append` only queues the message; queued messages are pushed into the
+    model together at most `fps` times a second. The list view only paints
+    the rows on screen, and the model keeps the last `capacity` lines, so
+    memory stays flat however many events arrive.
+    """
+
+    def __init__(self, capacity=2000, fps=30, parent=None):
+        super().__init__(parent)
+        self.model_ = LogModel(capacity, self)
+        self.setModel(self.model_)
+        self.setUniformItemSizes(True)  # Lets Qt skip measuring every row
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        self._pending = deque(maxlen=capacity)  # Older unflushed lines would be dropped anyway
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(max(1, 1000 // fps))
+        self._flush_timer.timeout.connect(self._flush)
+
+    def append(self, message):
+        self._pending.append(message)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        scrollbar = self.verticalScrollBar()
+        # Only follow new lines if the user hasn't scrolled up to read something
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        batch = list(self._pending)
+        self._pending.clear()
+        self.model_.extend(batch)
+        if at_bottom:
+            self.scrollToBottom()
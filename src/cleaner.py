@@ -1,14 +1,53 @@
-import shutil
-import magic            # Phase 0: The "Brain" for file types
-import pytesseract      # Phase 0: The "Eyes" for OCR
-from PIL import Image   # Phase 0: Image processing
+import os
+import threading
 from pathlib import Path
 import time
+from src.ocr_cache import OCRCache
+from src.dedup import DedupIndex
+from src.dest_index import DestinationIndex
+from src.keywords import KeywordMatcher
+from src.metrics import METRICS
+from src.mover import MoveEngine
+from src.ocr_engine import OCREngine  # Phase 0: The "Eyes" (warm Tesseract workers)
+from src.pdf_text import PDFTextScanner
+from src.probe import FileProbe, warm_up as warm_up_libmagic     # Phase 0: The "Brain" for file types (libmagic)
+from src.storage import app_data_dir
+
+DUPLICATES_FOLDER = "Duplicates"
+CLUSTERS_FOLDER = "Clusters"
+_NAME_ATTEMPTS = 8  # Fresh names tried when the one picked is taken by the time we move
 
 class FileCleaner:
     # [Phase 1] The Setup
-    def __init__(self, root_folder: Path):
+    def __init__(self, root_folder: Path, ocr_cache: OCRCache = None, ocr_engine: OCREngine = None,
+                 keywords_file: Path = None, dedup_mode: str = None, clustering: bool = False):
         self.root_folder = root_folder
+
+        # Re-downloaded files: None (off), "skip" (leave them be), "hardlink"
+        # (link to the copy we already have) or "move" (into Duplicates/)
+        if dedup_mode not in (None, "skip", "hardlink", "move"):
+            raise ValueError(f"Unknown dedup mode: {dedup_mode}")
+        self.dedup_mode = dedup_mode
+        self.dedup = DedupIndex(app_data_dir() / "dedup.sqlite3", root_folder) if dedup_mode else None
+
+        # Remembers OCR text by file contents so repeat images skip Tesseract
+        self.ocr_cache = ocr_cache or OCRCache(app_data_dir() / "ocr_cache.sqlite3")
+        # Keeps Tesseract workers alive between images (an engine passed in is
+        # shared with other cleaners, so shutdown leaves it running)
+        self._owns_ocr_engine = ocr_engine is None
+        self.ocr_engine = ocr_engine or OCREngine()
+        self.pdf_scanner = PDFTextScanner(self.ocr_engine)
+        # Names already taken in each category folder, so collisions need no stat calls
+        self.dest_index = DestinationIndex()
+        # Journaled, crash-safe moves; opened by warm_up or the first move
+        # (classify-only cleaners, like the sweep workers, never need it)
+        self._mover = None
+        self._mover_lock = threading.Lock()
+        # Optional: files no keyword matches are grouped by content similarity
+        self.clusters = None
+        if clustering:
+            from src.clusters import ClusterIndex  # Needs numpy, so only imported when asked for
+            self.clusters = ClusterIndex(app_data_dir() / "clusters.npz")
         
         # Mapping mime types to Folder Names
         self.type_mapping = {
@@ -30,18 +69,43 @@ class FileCleaner:
             "Invoice",
             "Project_Alpha" # Add your real projects here
         ]
+        # Extra keywords (one per line, optional "= priority") live in keywords.txt
+        # next to the caches and are picked up without a restart
+        self.keyword_matcher = KeywordMatcher(
+            self.project_keywords,
+            keywords_file=keywords_file or app_data_dir() / "keywords.txt",
+        )
 
     # [Phase 2] The "Eyes" (OCR Helper)
-    def _scan_image_for_text(self, file_path: Path) -> str:
-        # Private helper: Reads text inside an image.
+    def _scan_image_for_text(self, file_path: Path, probe: FileProbe) -> str:
+        # Private helper: Reads text inside an image, or a PDF's text layer.
         try:
-            # Check if it's an image before trying to read it
-            mime = magic.from_file(str(file_path), mime=True)
-            if 'image' in mime:
-                # Open image and extract text
-                image = Image.open(file_path)
-                text = pytesseract.image_to_string(image)
-                return text.lower() # Return lowercase for easy comparison
+            # Check what kind of file it is before trying to read it
+            # (inside the try: sniffing reads the file and can fail too)
+            if 'image' in probe.mime:
+                # Hand the image to a warm worker (text comes back lowercase)
+                reader = self.ocr_engine.image_to_text
+            elif probe.mime == 'application/pdf':
+                # Text layer page by page; only scanned pages go to OCR
+                reader = self.pdf_scanner.scan
+            else:
+                return ""
+
+            key = self.ocr_cache.key_for(file_path, probe.stat)
+            cached = self.ocr_cache.get(key)
+            if cached is not None:
+                text, complete = cached
+                # A partial scan is only good if it still contains a keyword
+                if complete or self.keyword_matcher.best(text):
+                    METRICS.inc("ocr_cache_hit")
+                    return text
+            METRICS.inc("ocr_cache_miss")
+
+            # Reading stops as soon as one of our keywords shows up
+            with METRICS.timed("pdf" if reader == self.pdf_scanner.scan else "ocr"):
+                text, complete = reader(file_path, stop_pattern=self.keyword_matcher.pattern)
+            self.ocr_cache.put(key, text, complete)
+            return text
         except Exception as e:
             # If OCR fails (e.g. file is corrupt), just move on. Don't crash.
             # print(f"OCR skipped for {file_path.name}: {e}")
@@ -49,42 +113,104 @@ class FileCleaner:
         
         return ""
 
+    def warm_up(self):
+        """Replays the move journal, loads libmagic and starts the OCR workers ahead of the first file."""
+        self.mover  # Opening it finishes or rolls back moves a crash interrupted
+        warm_up_libmagic()
+        self.ocr_engine.warm_up()
+
+    @property
+    def mover(self) -> MoveEngine:
+        with self._mover_lock:
+            if self._mover is None:
+                self._mover = MoveEngine(app_data_dir() / "moves.journal")
+            return self._mover
+
+    def undo_moves(self, count: int = None, since: float = None) -> int:
+        """Puts the last `count` files moved under this root (or all since `since`) back where they were."""
+        return self.mover.undo(count=count, since=since, root=self.root_folder)
+
+    def shutdown(self):
+        """Stops the OCR workers and flushes the move journal. Call when the cleaner is no longer needed."""
+        if self._owns_ocr_engine:
+            self.ocr_engine.shutdown()
+        if self.clusters is not None:
+            self.clusters.close()
+        with self._mover_lock:
+            if self._mover is not None:
+                self._mover.close()
+                self._mover = None
+
     # [Phase 3] The "Clusterer" (Context Helper)
-    def _detect_project_context(self, file_path: Path) -> str:
+    def _detect_project_context(self, file_path: Path, probe: FileProbe) -> str:
         """
         Private helper: Checks if file belongs to a Project.
         """
         # 1. Check Filename (Fastest)
-        filename_lower = file_path.name.lower()
-        
-        for keyword in self.project_keywords:
-            if keyword.lower() in filename_lower:
-                return f"Project_{keyword}"
+        keyword = self.keyword_matcher.best(file_path.name)
+        if keyword:
+            return f"Project_{keyword}"
 
         # 2. Check Content (Slower, but God-Tier)
         # We only scan if the filename didn't give us a match
-        content_text = self._scan_image_for_text(file_path)
+        content_text = self._scan_image_for_text(file_path, probe)
         
         if content_text:
-            for keyword in self.project_keywords:
-                if keyword.lower() in content_text:
-                    print(f"OCR Magic: Found '{keyword}' inside {file_path.name}!")
-                    return f"Project_{keyword}"
+            keyword = self.keyword_matcher.best(content_text)
+            if keyword:
+                print(f"OCR Magic: Found '{keyword}' inside {file_path.name}!")
+                return f"Project_{keyword}"
+
+        # 3. No keyword: join a group of similar files, if there is one
+        if self.clusters is not None:
+            label = self.clusters.assign(content_text or self.text_head(probe))
+            if label:
+                return f"{CLUSTERS_FOLDER}/{label}"
         
         return None
 
+    def text_head(self, probe: FileProbe) -> str:
+        """The start of a plain-text file (already read for MIME sniffing), for clustering."""
+        try:
+            if probe.mime.startswith("text/"):
+                return probe.header.decode("utf-8", "ignore")
+        except Exception:
+            pass
+        return ""
+
+    def wants_content_scan(self, file_path: Path, probe: FileProbe) -> bool:
+        """True if classifying this file would mean OCR or PDF reading (the slow path)."""
+        if self.keyword_matcher.best(file_path.name):
+            return False  # The filename already decides it
+        try:
+            mime = probe.mime
+        except Exception:
+            return False
+        return 'image' in mime or mime == 'application/pdf'
+
     # [Phase 4] The "Brain" (Decision Maker)
-    def identify_category(self, file_path: Path) -> str:
+    def identify_category(self, file_path: Path, probe: FileProbe = None) -> str:
         # Decides the final folder name.
+        with METRICS.timed("classify"):
+            return self._identify_category(file_path, probe)
+
+    def _identify_category(self, file_path: Path, probe: FileProbe = None) -> str:
+        if probe is None:
+            try:
+                probe = FileProbe(file_path)
+            except OSError as e:
+                print(f"Error reading file type: {e}")
+                return "Misc"
+
         # PRIORITY 1: Check Projects first (Clustering)
-        project_folder = self._detect_project_context(file_path)
+        project_folder = self._detect_project_context(file_path, probe)
         if project_folder:
             return project_folder
 
         # PRIORITY 2: Check File Type (Standard)
         try:
-            # Get the real MIME type (ex., 'image/png')
-            file_mime = magic.from_file(str(file_path), mime=True)
+            # Get the real MIME type (ex., 'image/png'), sniffed once per file
+            file_mime = probe.mime
             
             # Check if any of our keys are in that mime type
             for key, folder in self.type_mapping.items():
@@ -96,6 +222,47 @@ class FileCleaner:
         # Default fallback
         return "Misc"
 
+    # [Phase 4.5] The Deduplicator
+    def check_duplicate(self, file_path: Path, probe: FileProbe, hashes: dict = None):
+        """
+        Returns an already sorted file with the same contents, or None. Off unless dedup_mode is set.
+        Hashes computed along the way go into `hashes`, for place_file to reuse.
+        """
+        if self.dedup is None:
+            return None
+        try:
+            return self.dedup.find_duplicate(file_path, probe.stat, hashes)
+        except OSError:
+            return None
+
+    def place_duplicate(self, file_path: Path, original: Path, hashes: dict = None):
+        """Deals with a file whose contents we already have, according to dedup_mode."""
+        METRICS.inc("duplicates")
+        if self.dedup_mode == "skip":
+            print(f"Duplicate left in place: {file_path.name} (same as {original.name})")
+            return None
+        if self.dedup_mode == "move":
+            return self.place_file(file_path, DUPLICATES_FOLDER)
+
+        # Hardlink: the new name sits next to the original and shares its data
+        category = str(original.parent.relative_to(self.root_folder))
+        target_path = None
+        try:
+            target_path = self.dest_index.allocate(original.parent, file_path.name)
+            self.mover.link(file_path, original, target_path)
+        except FileExistsError:
+            # Taken behind our back; place_file picks another name
+            self.dest_index.reject(target_path)
+            return self.place_file(file_path, category, hashes)
+        except OSError:
+            # Different filesystem, no hardlink support or the duplicate could not be
+            # removed: try a normal move instead (place_file reports it if that fails too)
+            if target_path is not None:
+                self.dest_index.forget(target_path)
+            return self.place_file(file_path, category, hashes)
+        print(f"Linked duplicate: {file_path.name}  --->  {original.parent.name}")
+        return str(target_path)
+
     # [Phase 5] The Mover (Execution)
     def move_file(self, file_path: Path):
         """
@@ -104,26 +271,56 @@ class FileCleaner:
         if file_path.name.startswith(".") or file_path.name == "desktop.ini":
             return None
 
-        category = self.identify_category(file_path)
-        dest_folder = self.root_folder / category
-        dest_folder.mkdir(parents=True, exist_ok=True)
+        try:
+            probe = FileProbe(file_path)
+        except OSError as e:
+            print(f"Failed to move {file_path.name}: {e}")
+            return None
 
-        target_path = dest_folder / file_path.name
-        
-        # Collision handling
-        if target_path.exists():
-            stem = target_path.stem
-            suffix = target_path.suffix
-            counter = 1
-            while target_path.exists():
-                target_path = dest_folder / f"{stem}({counter}){suffix}"
-                counter += 1
+        # Known contents: no need to classify (or OCR) it again
+        hashes = {}
+        original = self.check_duplicate(file_path, probe, hashes)
+        if original is not None:
+            return self.place_duplicate(file_path, original, hashes)
+
+        category = self.identify_category(file_path, probe)
+        return self.place_file(file_path, category, hashes)
+
+    def place_file(self, file_path: Path, category: str, hashes: dict = None):
+        """
+        Moves the file into an already decided category folder.
+        Split out of move_file so classification can run on other threads.
+        `hashes` are the ones check_duplicate computed, so the dedup index needn't reread the file.
+        """
+        dest_folder = self.root_folder / category
 
         try:
-            shutil.move(str(file_path), str(target_path))
+            # Collision handling: the index hands out "name(n).ext" from memory
+            target_path = self.dest_index.allocate(dest_folder, file_path.name)
+            with METRICS.timed("move"):
+                retried = False
+                for _ in range(_NAME_ATTEMPTS):
+                    try:
+                        self.mover.move(file_path, target_path)
+                        break
+                    except FileExistsError:
+                        # The name was taken behind our back (moves never replace a file)
+                        self.dest_index.reject(target_path)
+                    except OSError:
+                        if retried or not file_path.exists():
+                            raise
+                        retried = True  # e.g. the folder was removed: list it again, once
+                        self.dest_index.invalidate(dest_folder)
+                    target_path = self.dest_index.allocate(dest_folder, file_path.name)
+                else:
+                    raise FileExistsError(f"no free name left in {category}")
+            METRICS.inc("moved")
+            if self.dedup is not None and category != DUPLICATES_FOLDER:
+                self.dedup.register(target_path, hashes)
             print(f"Moved: {file_path.name}  --->  {category}")
             return str(target_path) 
             
         except Exception as e:
+            METRICS.inc("move_failed")
             print(f"Failed to move {file_path.name}: {e}")
             return None
\ No newline at end of file
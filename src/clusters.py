@@ -0,0 +1,267 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+try:
+    import numpy as np  # Optional: only needed when clustering is switched on
+except ImportError:
+    np = None
+
+_TOKEN = re.compile(r"[a-z][a-z0-9]{2,}")
+_STOP_WORDS = frozenset(
+    "the and for with that this from are was were you your have has not but all can will "
+    "our their they them his her its one two any may per out into than then there here "
+    "which who what when where how also been more other some such only over page www com http https".split()
+)
+
+
+def clustering_available() -> bool:
+    """True if NumPy is installed, so content clustering can be used."""
+    return np is not None
+
+
+class ClusterIndex:
+    """
+    Groups files whose text looks alike, for files no project keyword matched.
+
+    Each text becomes a hashed TF-IDF vector (`dims` buckets, signed hashing)
+    and is compared with every cluster centroid in one matrix product. A text
+    that matches nothing starts a seed; the seed becomes a real cluster, with
+    a folder named after its strongest term, once a second file joins it.
+    Centroid sums, document frequencies and labels live in NumPy arrays that
+    are saved with np.savez, so the index keeps growing across runs.
+    """
+
+    def __init__(self, path: Path, dims: int = 1024, threshold: float = 0.35,
+                 max_clusters: int = 5000, min_tokens: int = 8, max_chars: int = 16 * 1024,
+                 save_every: int = 128, batch_size: int = 512):
+        if np is None:
+            raise RuntimeError("numpy is not installed, content clustering is unavailable")
+        self.path = Path(path)
+        self.dims = dims
+        self.threshold = threshold        # Cosine similarity needed to join a cluster
+        self.max_clusters = max_clusters  # Least recently used seeds are dropped past this
+        self.min_tokens = min_tokens      # Fewer words than this is not worth clustering
+        self.max_chars = max_chars
+        self.save_every = save_every  # Updates between saves; None only saves on close
+        self.batch_size = batch_size  # Texts compared per matrix product, bounds temporary memory
+        self._lock = threading.Lock()
+        self._dirty = 0
+
+        self.n_docs = 0
+        self.df = np.zeros(dims, dtype=np.float32)  # Documents seen per bucket
+        # Per-cluster arrays have spare rows at the end; only the first `size` are in use
+        self.size = 0
+        self._sums = np.zeros((0, dims), dtype=np.float32)  # Sum of member vectors
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self.terms = []   # Top terms of each cluster's first file
+        self.labels = []  # Folder name, "" while still a seed
+        self._load()
+
+    # --- Persistence ---
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data["dims"]) != self.dims:
+                    return  # Built with other settings; start over
+                n_docs = int(data["n_docs"])
+                df = data["df"].astype(np.float32)
+                sums = data["sums"].astype(np.float32)
+                counts = data["counts"].astype(np.int32)
+                last_used = data["last_used"].astype(np.float64)
+                terms = [str(t) for t in data["terms"]]
+                labels = [str(l) for l in data["labels"]]
+        except (OSError, KeyError, ValueError):
+            return
+        self.n_docs, self.df = n_docs, df
+        self.size = len(counts)
+        self._sums, self._counts, self._last_used = sums, counts, last_used
+        self._norms = np.linalg.norm(sums, axis=1).astype(np.float32)
+        self.terms, self.labels = terms, labels
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.stem + ".tmp.npz")
+        n = self.size
+        np.savez(tmp, dims=self.dims, n_docs=self.n_docs, df=self.df, sums=self._sums[:n],
+                 counts=self._counts[:n], last_used=self._last_used[:n],
+                 terms=np.array(self.terms, dtype=str), labels=np.array(self.labels, dtype=str))
+        os.replace(tmp, self.path)
+        self._dirty = 0
+
+    def close(self):
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    # --- Vectors ---
+    def _tokens(self, text: str) -> Counter:
+        words = _TOKEN.findall(text[:self.max_chars].lower())
+        return Counter(w for w in words if w not in _STOP_WORDS)
+
+    def _buckets(self, counts: Counter):
+        # crc32 rather than hash(): the same word must land in the same bucket in every process
+        hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in counts), dtype=np.int64,
+                             count=len(counts))
+        index = hashes % self.dims
+        sign = 1.0 - 2.0 * ((hashes // self.dims) & 1)
+        tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        return index, sign * tf
+
+    def _idf(self):
+        return (np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+
+    # --- Assignment ---
+    def assign(self, text: str):
+        """The cluster label for one text, or None (see assign_many)."""
+        return self.assign_many([text])[0]
+
+    def assign_many(self, texts: list) -> list:
+        """
+        Places each text in the nearest cluster and returns its label, or None
+        if it matched nothing yet (it is kept as a seed for later files).
+        Texts in the same batch can form a cluster together.
+        """
+        results = []
+        with self._lock:
+            for start in range(0, len(texts), self.batch_size):
+                results.extend(self._assign_batch(texts[start:start + self.batch_size]))
+            if self.save_every and self._dirty >= self.save_every:
+                self._save()
+        return results
+
+    def _assign_batch(self, texts: list) -> list:
+        results = [None] * len(texts)
+        docs = []
+        for i, text in enumerate(texts):
+            counts = self._tokens(text or "")
+            if sum(counts.values()) >= self.min_tokens:
+                docs.append((i, counts, *self._buckets(counts)))
+        if not docs:
+            return results
+
+        # Document frequencies first, so this batch's vectors use them too
+        for _, _, index, _ in docs:
+            self.df[np.unique(index)] += 1
+        self.n_docs += len(docs)
+        idf = self._idf()
+
+        queries = np.zeros((len(docs), self.dims), dtype=np.float32)
+        for row, (_, _, index, weights) in enumerate(docs):
+            np.add.at(queries[row], index, weights)
+        queries *= idf
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        # Every text against every centroid in one product
+        unmatched = []
+        n = self.size
+        if n:
+            sims = (queries @ self._sums[:n].T) / np.maximum(self._norms[:n], 1e-12)
+            best = sims.argmax(axis=1)
+            best_sim = sims[np.arange(len(docs)), best]
+        for row, (i, counts, _, _) in enumerate(docs):
+            if n and best_sim[row] >= self.threshold:
+                results[i] = self._join(int(best[row]), queries[row])
+            else:
+                unmatched.append(row)
+
+        # Leftovers: the first of each group of alike texts seeds a cluster, the rest join it
+        if unmatched:
+            group = queries[unmatched]
+            pair_sims = group @ group.T
+            taken = np.zeros(len(unmatched), dtype=bool)
+            for a in range(len(unmatched)):
+                if taken[a]:
+                    continue
+                taken[a] = True
+                leader_row = unmatched[a]
+                leader_i, leader_counts, index, weights = docs[leader_row]
+                cluster = self._seed(queries[leader_row], leader_counts, index, weights, idf)
+                members = np.nonzero(~taken & (pair_sims[a] >= self.threshold))[0]
+                for b in members:
+                    taken[b] = True
+                    results[docs[unmatched[b]][0]] = self._join(cluster, queries[unmatched[b]])
+                if len(members):
+                    results[leader_i] = self.labels[cluster]  # Not moved yet, so it can go too
+
+        self._dirty += len(docs)
+        return results
+
+    def _join(self, cluster: int, vector) -> str:
+        self._sums[cluster] += vector
+        self._norms[cluster] = np.linalg.norm(self._sums[cluster])
+        self._counts[cluster] += 1
+        self._last_used[cluster] = time.time()
+        if not self.labels[cluster]:
+            self.labels[cluster] = self._unique_label(self.terms[cluster])
+        return self.labels[cluster]
+
+    def _seed(self, vector, counts: Counter, index, weights, idf) -> int:
+        if self.size >= self.max_clusters:
+            self._evict()
+        if self.size == len(self._counts):
+            self._grow()
+        # The founding file's strongest terms name the folder later on
+        strength = np.abs(weights) * idf[index]
+        words = list(counts)
+        top = [words[j] for j in np.argsort(-strength, kind="stable")[:3]]
+
+        cluster = self.size
+        self._sums[cluster] = vector
+        self._norms[cluster] = np.linalg.norm(vector)
+        self._counts[cluster] = 1
+        self._last_used[cluster] = time.time()
+        self.terms.append(" ".join(top))
+        self.labels.append("")
+        self.size += 1
+        return cluster
+
+    def _grow(self):
+        # Double the spare rows so adding a seed is amortised O(dims), not a full copy
+        capacity = max(64, 2 * len(self._counts))
+        n = self.size
+        sums = np.zeros((capacity, self.dims), dtype=np.float32)
+        sums[:n] = self._sums[:n]
+        self._sums = sums
+        self._norms = np.resize(self._norms[:n], capacity)
+        self._counts = np.resize(self._counts[:n], capacity)
+        self._last_used = np.resize(self._last_used[:n], capacity)
+
+    def _evict(self):
+        # Drop the stalest seed; real clusters are only dropped if there are no seeds left
+        n = self.size
+        seeds = np.nonzero(self._counts[:n] == 1)[0]
+        pool = seeds if len(seeds) else np.arange(n)
+        victim = int(pool[self._last_used[pool].argmin()])
+        # Swap the last cluster into the gap
+        last = n - 1
+        for array in (self._sums, self._norms, self._counts, self._last_used):
+            array[victim] = array[last]
+        self.terms[victim], self.labels[victim] = self.terms[last], self.labels[last]
+        self.terms.pop()
+        self.labels.pop()
+        self.size -= 1
+
+    def _unique_label(self, terms: str) -> str:
+        base = (terms.split() or ["cluster"])[0].title()
+        taken = set(self.labels)
+        label, n = base, 2
+        while label in taken:
+            label = f"{base}_{n}"
+            n += 1
+        return label
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = int((self._counts[:self.size] > 1).sum())
+            return {"clusters": active, "seeds": self.size - active, "documents": self.n_docs}
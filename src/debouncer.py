@@ -0,0 +1,193 @@
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from src.metrics import METRICS
+
+
+class _Pending:
+    __slots__ = ("size", "mtime_ns", "last_event", "first_seen", "closed", "rounds")
+
+    def __init__(self, now: float):
+        self.size = -1
+        self.mtime_ns = -1
+        self.last_event = now
+        self.first_seen = now
+        self.closed = False
+        self.rounds = 0
+
+
+class FileDebouncer:
+    """
+    Coalesces bursts of filesystem events into one "file is ready" callback.
+
+    Every path has at most one pending entry, parked on a hashed timer wheel
+    serviced by a single thread. When its slot comes round the file is
+    stat'ed once: if size and mtime are unchanged and no event arrived for
+    `quiet_period` seconds, `on_ready(path)` is called. A close-after-write
+    notification (inotify IN_CLOSE_WRITE) skips the quiet period and
+    dispatches on the next tick.
+
+    `on_ready` returns False when it cannot accept the path yet (downstream
+    is full); the entry is then kept and retried instead of being lost.
+    """
+
+    def __init__(self, on_ready, quiet_period: float = 0.5, tick: float = 0.05,
+                 slots: int = 64, max_pending: int = 4096, give_up_after: float = 300.0):
+        self.on_ready = on_ready
+        self.quiet_period = quiet_period
+        self.tick = tick
+        self.max_pending = max_pending
+        self.give_up_after = give_up_after
+
+        self.dispatched = 0
+        self.coalesced = 0
+        self.rechecks = 0
+        self.expired = 0
+
+        self._wheel = [set() for _ in range(slots)]
+        self._entries = {}
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Control ---
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="debouncer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    # --- Events ---
+    def touch(self, file_path: Path) -> bool:
+        """Records an event for a path. Returns False if too many paths are pending."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None:
+                # Already scheduled: just push its deadline back
+                entry.last_event = now
+                entry.closed = False  # Written to again after the last close
+                self.coalesced += 1
+                return True
+            if len(self._entries) >= self.max_pending:
+                return False
+            entry = self._entries[file_path] = _Pending(now)
+            # Seed the baseline so the first recheck can already succeed
+            try:
+                st = os.stat(file_path)
+                entry.size, entry.mtime_ns = st.st_size, st.st_mtime_ns
+            except OSError:
+                pass
+            self._schedule(file_path, self.quiet_period)
+        return True
+
+    def mark_closed(self, file_path: Path) -> bool:
+        """The writer closed the file: check it on the next tick instead of waiting."""
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None:
+                if len(self._entries) >= self.max_pending:
+                    return False
+                entry = self._entries[file_path] = _Pending(time.monotonic())
+            else:
+                self._unschedule(file_path)
+            entry.closed = True
+            self._schedule(file_path, 0)
+        return True
+
+    def forget(self, file_path: Path):
+        with self._lock:
+            if self._entries.pop(file_path, None) is not None:
+                self._unschedule(file_path)
+
+    # --- Timer wheel ---
+    def _schedule(self, file_path: Path, delay: float):
+        ticks = max(1, math.ceil(delay / self.tick))
+        self._entries[file_path].rounds = (ticks - 1) // len(self._wheel)
+        self._wheel[(self._cursor + ticks) % len(self._wheel)].add(file_path)
+
+    def _unschedule(self, file_path: Path):
+        for slot in self._wheel:
+            slot.discard(file_path)
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            next_tick += self.tick
+            delay = next_tick - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            with self._lock:
+                self._cursor = (self._cursor + 1) % len(self._wheel)
+                slot = self._wheel[self._cursor]
+                due = []
+                for file_path in list(slot):
+                    entry = self._entries[file_path]
+                    if entry.rounds > 0:
+                        entry.rounds -= 1
+                    else:
+                        slot.discard(file_path)
+                        due.append(file_path)
+
+            for file_path in due:
+                self._check(file_path)
+
+    def _check(self, file_path: Path):
+        self.rechecks += 1
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            self.forget(file_path)  # Deleted or renamed away
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None:
+                return
+            changed = (st.st_size, st.st_mtime_ns) != (entry.size, entry.mtime_ns)
+            entry.size, entry.mtime_ns = st.st_size, st.st_mtime_ns
+            quiet_for = now - entry.last_event
+
+            if entry.closed:
+                ready = True
+            else:
+                ready = not changed and quiet_for >= self.quiet_period and st.st_size > 0
+
+            if not ready:
+                if now - entry.first_seen > self.give_up_after:
+                    del self._entries[file_path]
+                    self.expired += 1
+                else:
+                    self._schedule(file_path, max(self.tick, self.quiet_period - quiet_for))
+                return
+
+        if self.on_ready(file_path):
+            with self._lock:
+                self._entries.pop(file_path, None)
+            self.dispatched += 1
+            # First event to hand-off: how long we waited for the file to settle
+            METRICS.observe("stability", now - entry.first_seen)
+        else:
+            with self._lock:
+                if file_path in self._entries:
+                    self._schedule(file_path, self.quiet_period)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._entries),
+            "capacity": self.max_pending,
+            "dispatched": self.dispatched,
+            "coalesced": self.coalesced,
+            "rechecks": self.rechecks,
+            "expired": self.expired,
+        }
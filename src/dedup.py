@@ -0,0 +1,158 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class DedupIndex:
+    """
+    Persistent index of files already sorted under a root, for spotting re-downloads.
+
+    Lookups narrow down in three steps, each more expensive than the last:
+    same size (no I/O), same hash of the first `PARTIAL_SIZE` bytes, then same
+    full hash. Hashes of indexed files are computed on first need and stored,
+    so most files are never read at all and none is read twice.
+    """
+
+    PARTIAL_SIZE = 64 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, db_path: Path, root_folder: Path):
+        self.root = str(Path(root_folder))
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, root TEXT, size INTEGER, mtime_ns INTEGER,"
+            " partial TEXT, full TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_size ON files (root, size)")
+        self._conn.commit()
+
+        known = self._conn.execute("SELECT COUNT(*) FROM files WHERE root=?", (self.root,)).fetchone()[0]
+        if not known:
+            self.scan()
+
+    # --- Building ---
+    def scan(self):
+        """Indexes every file in the category folders (stat only, no reading)."""
+        rows = []
+        stack = []
+        with os.scandir(self.root) as entries:
+            stack.extend(e.path for e in entries
+                         if e.is_dir(follow_symlinks=False) and not e.name.startswith("."))
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for e in entries:
+                        if e.name.startswith("."):
+                            continue
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                        elif e.is_file(follow_symlinks=False):
+                            st = e.stat(follow_symlinks=False)
+                            rows.append((e.path, self.root, st.st_size, st.st_mtime_ns))
+            except OSError:
+                continue
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO files (path, root, size, mtime_ns) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def register(self, path: Path, hashes: dict = None):
+        """Adds a file we just placed. Pass the `hashes` find_duplicate filled in so it is not read again."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if not hashes or hashes.get("mtime_ns") != st.st_mtime_ns:
+            hashes = {}  # Computed for other contents (or not at all)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (str(path), self.root, st.st_size, st.st_mtime_ns, hashes.get("partial"), hashes.get("full")),
+            )
+            self._conn.commit()
+
+    def forget(self, path: Path):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path=?", (str(path),))
+            self._conn.commit()
+
+    # --- Hashing ---
+    def _partial_hash(self, path) -> str:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(self.PARTIAL_SIZE), digest_size=16).hexdigest()
+
+    def _full_hash(self, path) -> str:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _candidate_hash(self, row, kind: str):
+        """Stored hash of an indexed file, computed and saved on first use. None if it changed or vanished."""
+        path, mtime_ns, stored = row[0], row[1], row[2]
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.forget(path)
+            return None
+        if st.st_mtime_ns != mtime_ns:
+            self.register(Path(path))  # Edited since we indexed it; hashes are stale
+            return None
+        if stored:
+            return stored
+        value = self._partial_hash(path) if kind == "partial" else self._full_hash(path)
+        with self._lock:
+            self._conn.execute(f"UPDATE files SET {kind}=? WHERE path=?", (value, path))
+            self._conn.commit()
+        return value
+
+    # --- Lookup ---
+    def find_duplicate(self, file_path: Path, stat_result=None, hashes: dict = None):
+        """
+        Returns the path of an indexed file with identical contents, or None.
+
+        `hashes` carries the file's own hashes between calls: ones already in
+        it are reused, ones computed here are added (see register).
+        """
+        st = stat_result or os.stat(file_path)
+        if hashes is None:
+            hashes = {}
+        elif hashes.get("mtime_ns") != st.st_mtime_ns:
+            hashes.clear()  # The file changed since they were computed
+        hashes["mtime_ns"] = st.st_mtime_ns
+        if st.st_size == 0:
+            return None  # Empty files are all "equal"; not worth treating as duplicates
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, partial, full FROM files WHERE root=? AND size=? AND path!=?",
+                (self.root, st.st_size, str(file_path)),
+            ).fetchall()
+        if not rows:
+            return None
+
+        partial = hashes.get("partial")
+        if partial is None:
+            partial = hashes["partial"] = self._partial_hash(file_path)
+        full = hashes.get("full")
+        for path, mtime_ns, cand_partial, cand_full in rows:
+            if self._candidate_hash((path, mtime_ns, cand_partial), "partial") != partial:
+                continue
+            if st.st_size <= self.PARTIAL_SIZE:
+                return Path(path)  # The partial hash already covered the whole file
+            if full is None:
+                full = hashes["full"] = self._full_hash(file_path)
+            if self._candidate_hash((path, mtime_ns, cand_full), "full") == full:
+                return Path(path)
+        return None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,111 @@
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+
+# "report(3).pdf" -> stem "report", counter 3 (collision names made by place_file)
+_COUNTED = re.compile(r"^(?P<stem>.*)\((?P<n>\d+)\)$")
+
+
+def _key(name: str) -> str:
+    # macOS and Windows filesystems ignore case (and macOS the Unicode form), so
+    # "Report.txt" and "report.txt" are one name there; treat them as one everywhere
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+class _Folder:
+    __slots__ = ("names", "top")
+
+    def __init__(self):
+        self.names = set()  # Case-folded, see _key
+        self.top = {}  # (stem, suffix), case-folded -> highest collision counter seen
+
+
+class DestinationIndex:
+    """
+    In-memory listing of every category folder we move files into.
+
+    A folder is listed once (one os.scandir) the first time it is used; after
+    that, checking whether it exists and picking a free "name(n).ext" is a
+    dictionary lookup. The index is kept current by our own moves and by
+    watcher events for the category folders; `invalidate` drops a folder so
+    it is listed again on next use.
+    """
+
+    def __init__(self):
+        self._folders = {}
+        self._lock = threading.Lock()
+
+    def _folder(self, folder: Path) -> _Folder:
+        entry = self._folders.get(folder)
+        if entry is None:
+            entry = _Folder()
+            folder.mkdir(parents=True, exist_ok=True)
+            with os.scandir(folder) as entries:
+                for e in entries:
+                    self._note(entry, e.name)
+            self._folders[folder] = entry
+        return entry
+
+    @staticmethod
+    def _note(entry: _Folder, name: str):
+        name = _key(name)
+        entry.names.add(name)
+        stem, suffix = os.path.splitext(name)
+        match = _COUNTED.match(stem)
+        if match:
+            key = (match.group("stem"), suffix)
+            entry.top[key] = max(entry.top.get(key, 0), int(match.group("n")))
+
+    def allocate(self, folder: Path, name: str) -> Path:
+        """
+        Reserves a free name in `folder` (creating it if needed) and returns the full path.
+        Free as far as the listing knows: if the move then finds the name taken,
+        `reject` it and allocate again.
+        """
+        with self._lock:
+            entry = self._folder(folder)
+            if _key(name) not in entry.names:
+                self._note(entry, name)
+                return folder / name
+
+            # Collision: continue after the highest "(n)" already used for this name
+            stem, suffix = os.path.splitext(name)
+            counter = entry.top.get(os.path.splitext(_key(name)), 0) + 1
+            while _key(f"{stem}({counter}){suffix}") in entry.names:
+                counter += 1
+            candidate = f"{stem}({counter}){suffix}"
+            self._note(entry, candidate)
+            return folder / candidate
+
+    # --- Keeping in sync ---
+    def add(self, path: Path):
+        with self._lock:
+            entry = self._folders.get(path.parent)
+            if entry is not None:
+                self._note(entry, path.name)
+
+    def forget(self, path: Path):
+        # The counter high-water mark is kept; it only ever makes names longer, never wrong
+        with self._lock:
+            entry = self._folders.get(path.parent)
+            if entry is not None:
+                entry.names.discard(_key(path.name))
+
+    def reject(self, path: Path):
+        """
+        The filesystem says `path` is taken although we handed it out: re-lists
+        its folder and keeps the name marked as taken even if the listing does
+        not show it, so the next allocate moves on to another name.
+        """
+        with self._lock:
+            self._folders.pop(path.parent, None)
+            self._note(self._folder(path.parent), path.name)
+
+    def invalidate(self, folder: Path):
+        """Drops a folder (and anything under it) so it is re-listed on next use."""
+        with self._lock:
+            for known in list(self._folders):
+                if known == folder or folder in known.parents:
+                    del self._folders[known]
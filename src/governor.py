@@ -0,0 +1,64 @@
+import os
+import threading
+
+
+class LoadGovernor:
+    """
+    Decides how many OCR jobs may run at once, based on how busy the machine is.
+
+    Fed by a StatsSampler: while CPU or RAM is above its `high` threshold the
+    limit is halved on every sample (down to zero, which pauses OCR), and once
+    both are back under the `low` thresholds it grows by one per sample up to
+    `max_concurrency`. Cheap work such as filename and MIME checks never asks
+    the governor; only OCR does.
+    """
+
+    def __init__(self, max_concurrency: int = None, min_concurrency: int = 0,
+                 cpu_high: float = 85.0, cpu_low: float = 60.0,
+                 ram_high: float = 90.0, ram_low: float = 80.0):
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.min_concurrency = min_concurrency
+        self.cpu_high, self.cpu_low = cpu_high, cpu_low
+        self.ram_high, self.ram_low = ram_high, ram_low
+
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.last_sample = None
+        self._lock = threading.Lock()
+
+    # --- Feedback from the monitor ---
+    def on_sample(self, sample):
+        """StatsSampler listener: (timestamp, cpu %, ram %)."""
+        _, cpu, ram = sample
+        with self._lock:
+            self.last_sample = sample
+            if cpu > self.cpu_high or ram > self.ram_high:
+                self.limit = max(self.min_concurrency, self.limit // 2)
+            elif cpu < self.cpu_low and ram < self.ram_low:
+                self.limit = min(self.max_concurrency, self.limit + 1)
+
+    @property
+    def overloaded(self) -> bool:
+        return self.limit == 0
+
+    # --- Admission ---
+    def try_acquire(self, force: bool = False) -> bool:
+        """Takes an OCR slot if one is free. `force` takes one regardless of load."""
+        with self._lock:
+            if force or self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def release(self):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def stats(self) -> dict:
+        sample = self.last_sample
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "cpu": sample[1] if sample else None,
+            "ram": sample[2] if sample else None,
+        }
@@ -1,29 +1,53 @@
 import sys
+import threading
 from pathlib import Path
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                               QHBoxLayout, QPushButton, QLabel, QFileDialog, QTextEdit,
+from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
+                               QHBoxLayout, QPushButton, QLabel, QFileDialog,
                                QFrame)
-from PySide6.QtCore import QThread, Signal, Qt
+from PySide6.QtCore import QThread, QTimer, Signal, Qt
 from PySide6.QtGui import QFont, QIcon
-from src.watcher import DesktopWatcher
+from src.activity_log import ActivityLog
+from src.metrics import METRICS
 from src.optimizer import SystemOptimizer 
 
 class WatcherThread(QThread):
     log_signal = Signal(str)
 
-    def __init__(self, folder_path):
+    def __init__(self, folder_path, cleaner_factory=None):
         super().__init__()
         self.folder_path = folder_path
+        self.cleaner_factory = cleaner_factory  # Returns a (warm) FileCleaner for a folder
         self.watcher = None
 
     def run(self):
-        self.watcher = DesktopWatcher(self.folder_path, logger_func=self.log_signal.emit)
+        # Imported here: watchdog, SQLite and the classifier are not needed to draw the window
+        from src.watcher import DesktopWatcher
+        cleaner = self.cleaner_factory(self.folder_path) if self.cleaner_factory else None
+        self.watcher = DesktopWatcher(self.folder_path, logger_func=self.log_signal.emit, cleaner=cleaner)
         self.watcher.start()
         # Keep thread alive
         while not self.isInterruptionRequested():
             self.msleep(500)
         self.watcher.stop()
 
+class OptimizerThread(QThread):
+    progress_signal = Signal(object, object)  # bytes freed, files processed (may exceed 32 bits)
+    done_signal = Signal(str)
+
+    def __init__(self, optimizer):
+        super().__init__()
+        self.optimizer = optimizer
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        result = self.optimizer.run_speed_up(
+            progress_func=self.progress_signal.emit, cancel_event=self.cancel_event
+        )
+        self.done_signal.emit(result)
+
+    def cancel(self):
+        self.cancel_event.set()
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -33,11 +57,59 @@ class MainWindow(QMainWindow):
         # State
         self.folder_path = Path.home() / "Desktop" / "Cleaner_Test_Zone"
         self.worker_thread = None
+        self.boost_thread = None
+        self.on_speed_up_page = False
         self.optimizer = SystemOptimizer() # Initialize the Speed Up Engine
+        self.optimizer.sampler.start()     # CPU/RAM history, sampled off the GUI thread
+        # One FileCleaner per folder, kept across Start/Stop; they all share one
+        # OCR engine, so its workers stay warm and picking a new folder starts no new pool
+        self._cleaners = {}
+        self._cleaner_lock = threading.Lock()
+        self._ocr_engine = None
 
         self.init_ui()
         self.apply_styles()
 
+        # Live stage timings, refreshed once a second
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
+        self.metrics_timer.timeout.connect(self.refresh_system_stats)
+        self.metrics_timer.start(1000)
+
+        # Load libmagic and start OCR once the window is up, not before it
+        QTimer.singleShot(0, self.start_warm_up)
+
+    def cleaner_for(self, folder):
+        """The cleaner for `folder`, built on first use. Safe to call from any thread."""
+        with self._cleaner_lock:
+            cleaner = self._cleaners.get(folder)
+            if cleaner is None:
+                from src.cleaner import FileCleaner
+                from src.ocr_engine import OCREngine
+                if self._ocr_engine is None:
+                    self._ocr_engine = OCREngine()
+                cleaner = FileCleaner(folder, ocr_engine=self._ocr_engine)
+                self._cleaners[folder] = cleaner
+            return cleaner
+
+    def _drop_cleaners(self, keep):
+        """Shuts down the cleaners of folders in neither `keep` nor use by the watcher."""
+        if self.worker_thread:
+            keep = set(keep) | {self.worker_thread.folder_path}
+        with self._cleaner_lock:
+            for folder in [f for f in self._cleaners if f not in keep]:
+                self._cleaners.pop(folder).shutdown()
+
+    def start_warm_up(self):
+        folder = self.folder_path
+        threading.Thread(target=self._warm_up, args=(folder,), name="warm-up", daemon=True).start()
+
+    def _warm_up(self, folder):
+        try:
+            self.cleaner_for(folder).warm_up()
+        except Exception as e:
+            print(f"[warm-up] skipped: {e}")  # The first file will pay for it instead
+
     def init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -115,13 +187,19 @@ class MainWindow(QMainWindow):
         content_layout.addLayout(scan_layout)
         
         # Log Window
-        self.log_window = QTextEdit()
+        # Virtualized ring-buffer log, repainted at most 30 times a second
+        self.log_window = ActivityLog(capacity=2000, fps=30)
         self.log_window.setObjectName("logWindow")
-        self.log_window.setReadOnly(True)
         self.log_window.setMaximumHeight(150)
         self.log_window.append("System Ready...")
         content_layout.addWidget(self.log_window)
 
+        # Metrics Panel
+        self.metrics_label = QLabel("No activity yet")
+        self.metrics_label.setObjectName("metricsPanel")
+        self.metrics_label.setWordWrap(True)
+        content_layout.addWidget(self.metrics_label)
+
         main_layout.addWidget(content_area)
 
     def apply_styles(self):
@@ -163,6 +241,7 @@ class MainWindow(QMainWindow):
                 background-color: #151925; color: #00ff00; font-family: 'Courier New';
                 border: 1px solid #2a2f45; border-radius: 10px; padding: 10px;
             }
+            #metricsPanel { color: #a4aabf; font-family: 'Courier New'; font-size: 11px; padding-top: 6px; }
         """)
 
     # --- PAGE LOGIC ---
@@ -172,11 +251,13 @@ class MainWindow(QMainWindow):
         for btn in self.nav_btns: btn.setChecked(False)
         self.nav_btns[1].setChecked(True) # Index 1 is Speed Up
 
-        # Update Stats & UI
+        # Update Stats & UI (latest background sample, no waiting)
+        self.on_speed_up_page = True
         stats = self.optimizer.get_system_stats()
         self.status_label.setText(f"System Status: {stats}")
-        self.scan_btn.setText("BOOST")
-        self.scan_btn.setChecked(False) # Reset button state
+        boosting = self.boost_thread is not None
+        self.scan_btn.setText("CANCEL" if boosting else "BOOST")
+        self.scan_btn.setChecked(boosting) # Reset button state
         
         # Rewire Button
         try: self.scan_btn.clicked.disconnect() 
@@ -192,9 +273,11 @@ class MainWindow(QMainWindow):
         self.nav_btns[0].setChecked(True) # Index 0 is Care
 
         # Update UI
+        self.on_speed_up_page = False
         self.status_label.setText(f"Watching: {self.folder_path.name}")
-        self.scan_btn.setText("SCAN")
-        self.scan_btn.setChecked(False)
+        watching = self.worker_thread is not None
+        self.scan_btn.setText("STOP" if watching else "SCAN")
+        self.scan_btn.setChecked(watching)
 
         # Rewire Button
         try: self.scan_btn.clicked.disconnect() 
@@ -210,34 +293,77 @@ class MainWindow(QMainWindow):
             self.folder_path = Path(folder)
             self.status_label.setText(f"Watching: {self.folder_path.name}")
             self.log_window.append(f"Target changed to: {self.folder_path}")
+            self._drop_cleaners({self.folder_path})
+            self.start_warm_up()
 
     def update_log(self, message):
+        # Batched and auto-scrolled by the log itself
         self.log_window.append(message)
-        scrollbar = self.log_window.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
 
-    def perform_boost(self):
-        """Runs the System Speed Up"""
+    def refresh_metrics(self):
+        """Shows where the time goes: p50/p95 per stage, queue depths and counters."""
+        snap = METRICS.snapshot()
+        if not snap["stages"] and not snap["counters"]:
+            return
+        stages = "  ".join(
+            f"{name} {s['p50_ms']:.0f}/{s['p95_ms']:.0f}ms"
+            for name, s in sorted(snap["stages"].items())
+        )
+        queues = "  ".join(
+            f"{name.replace('_queue_depth', '')}:{value}"
+            for name, value in sorted(snap["gauges"].items()) if name.endswith("_queue_depth")
+        )
+        counters = snap["counters"]
+        self.metrics_label.setText(
+            f"p50/p95  {stages}\n"
+            f"queues  {queues or '-'}   moved {counters.get('moved', 0)}"
+            f"   failed {counters.get('move_failed', 0)}   dropped {counters.get('dropped', 0)}"
+            f"   OCR cache {counters.get('ocr_cache_hit', 0)} hit / {counters.get('ocr_cache_miss', 0)} miss"
+        )
+
+    def refresh_system_stats(self):
+        """Keeps the Speed Up header live from the background sampler."""
+        if self.on_speed_up_page and self.boost_thread is None:
+            self.status_label.setText(f"System Status: {self.optimizer.get_system_stats()}")
+
+    def perform_boost(self, checked):
+        """Runs the System Speed Up in the background (click again to cancel)"""
+        if not checked:
+            if self.boost_thread:
+                self.scan_btn.setText("STOPPING")
+                self.boost_thread.cancel()
+            return
+
         self.log_window.append("--- 🚀 Starting Speed Up Optimization ---")
-        self.scan_btn.setChecked(True) # Keep it pressed visually
-        QApplication.processEvents()   # Force UI update so it doesn't freeze
-        
-        # Run Cleaning
-        result = self.optimizer.run_speed_up()
+        self.scan_btn.setText("CANCEL")
+        self.boost_thread = OptimizerThread(self.optimizer)
+        self.boost_thread.progress_signal.connect(self.update_boost_progress)
+        self.boost_thread.done_signal.connect(self.finish_boost)
+        self.boost_thread.start()
+
+    def update_boost_progress(self, bytes_freed, files):
+        if self.on_speed_up_page:
+            mb = bytes_freed / (1024 * 1024)
+            self.status_label.setText(f"Boosting... {mb:.1f} MB freed, {files} files")
+
+    def finish_boost(self, result):
+        self.boost_thread.wait()
+        self.boost_thread = None
         self.log_window.append(result)
-        
-        # Refresh Stats
-        new_stats = self.optimizer.get_system_stats()
-        self.status_label.setText(f"System Status: {new_stats}")
-        
-        self.scan_btn.setChecked(False) # Release button
+
+        if self.on_speed_up_page:
+            # Refresh Stats
+            new_stats = self.optimizer.get_system_stats()
+            self.status_label.setText(f"System Status: {new_stats}")
+            self.scan_btn.setText("BOOST")
+            self.scan_btn.setChecked(False) # Release button
 
     def toggle_cleaning(self, checked):
         """Toggles the AI Desktop Watcher"""
         if checked:
             self.scan_btn.setText("STOP")
             self.log_window.append("--- AI Service Started ---")
-            self.worker_thread = WatcherThread(self.folder_path)
+            self.worker_thread = WatcherThread(self.folder_path, self.cleaner_for)
             self.worker_thread.log_signal.connect(self.update_log)
             self.worker_thread.start()
         else:
@@ -247,4 +373,22 @@ class MainWindow(QMainWindow):
                 self.worker_thread.requestInterruption()
                 self.worker_thread.wait()
                 self.worker_thread = None
-                self.log_window.append("--- Service Stopped ---")
\ No newline at end of file
+                self.log_window.append("--- Service Stopped ---")
+
+    def closeEvent(self, event):
+        if self.boost_thread:
+            self.boost_thread.cancel()
+            self.boost_thread.wait()
+        if self.worker_thread:
+            self.worker_thread.requestInterruption()
+            self.worker_thread.wait()
+            self.worker_thread = None
+        self.optimizer.sampler.stop()
+        with self._cleaner_lock:
+            for cleaner in self._cleaners.values():
+                cleaner.shutdown()
+            self._cleaners.clear()
+            if self._ocr_engine is not None:
+                self._ocr_engine.shutdown()
+                self._ocr_engine = None
+        super().closeEvent(event)
@@ -0,0 +1,184 @@
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+# "Not preceded/followed by a letter or digit" - unlike \b this treats "_" as a
+# separator, so "Physics" still matches inside "Physics_Homework.pdf"
+_WORD_START = r"(?<![^\W_])"
+_WORD_END = r"(?![^\W_])"
+_AT_WORD_END = re.compile(_WORD_END)
+
+
+def _trie_pattern(words) -> str:
+    """
+    One regex for all `words`, factored by shared prefixes: "invoice",
+    "invoices" and "income" become "in(?:voices?|come)". Each branch starts
+    with a different character, so a failed position costs a handful of
+    character tests instead of one attempt per keyword.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # End of a keyword
+
+    def emit(node) -> str:
+        ends_here = "" in node
+        children = [(ch, child) for ch, child in sorted(node.items()) if ch]
+        if not children:
+            return ""
+        # Keywords that end one character later share a character class
+        leaves = [ch for ch, child in children if list(child) == [""]]
+        branches = [re.escape(ch) + emit(child) for ch, child in children if list(child) != [""]]
+        if len(leaves) == 1:
+            branches.append(re.escape(leaves[0]))
+        elif leaves:
+            branches.append("[" + "".join(re.escape(ch) for ch in leaves) + "]")
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            # Greedy: the longer keyword is tried first, the shorter one is kept as a fallback
+            return f"(?:{body})?" if len(body) > 1 else f"{body}?"
+        return body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds project keywords in a filename or OCR text in one pass.
+
+    All keywords are lowercased and compiled into a single regex factored as
+    a prefix trie, so the text is scanned once and each position costs about
+    the same however many keywords there are. Keywords come from a built-in
+    list plus an optional text file (one `keyword` or `keyword = priority`
+    per line, `#` for comments) that is reloaded automatically when it changes.
+    """
+
+    def __init__(self, keywords=(), keywords_file: Path = None,
+                 word_boundaries: bool = False, reload_interval: float = 2.0):
+        self.base_keywords = {k: 0 for k in keywords}
+        self.keywords_file = Path(keywords_file) if keywords_file else None
+        self.word_boundaries = word_boundaries
+        self.reload_interval = reload_interval
+
+        self._file_mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._compiled = None  # (regex, {lowercase keyword: (keyword, priority, list position)})
+        self._rebuild(self._read_file())
+
+    # --- Building ---
+    def _read_file(self) -> dict:
+        entries = {}
+        if self.keywords_file is None:
+            return entries
+        try:
+            self._file_mtime = os.stat(self.keywords_file).st_mtime_ns
+            lines = self.keywords_file.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            self._file_mtime = None
+            return entries
+
+        for line in lines:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            keyword, _, priority = line.partition("=")
+            keyword = keyword.strip()
+            try:
+                entries[keyword] = int(priority) if priority.strip() else 0
+            except ValueError:
+                print(f"Ignoring bad priority for keyword '{keyword}' in {self.keywords_file}")
+                entries[keyword] = 0
+        return entries
+
+    def _rebuild(self, file_entries: dict):
+        merged = dict(self.base_keywords)
+        merged.update(file_entries)
+        # Built-in keywords first, then the file's, in the order they are listed
+        lookup = {k.lower(): (k, p, i) for i, (k, p) in enumerate(merged.items()) if k}
+        if not lookup:
+            self._compiled = (None, {})
+            return
+
+        alternation = _trie_pattern(lookup)
+        if self.word_boundaries:
+            alternation = f"{_WORD_START}(?:{alternation}){_WORD_END}"
+        # Case-sensitive on lowercased text: IGNORECASE makes re test every position the slow way
+        regex = re.compile(alternation)
+        self._compiled = (regex, lookup)
+
+    def _maybe_reload(self):
+        if self.keywords_file is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return
+            self._last_check = now
+            try:
+                mtime = os.stat(self.keywords_file).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self._file_mtime:
+                self._rebuild(self._read_file())
+
+    # --- Matching ---
+    def find_all(self, text: str) -> list:
+        """Returns every (keyword, priority, position) hit in the text."""
+        return [hit[:3] for hit in self._find(text)]
+
+    def _find(self, text: str) -> list:
+        # Hits as (keyword, priority, position, list position), by position
+        self._maybe_reload()
+        regex, lookup = self._compiled
+        if regex is None or not text:
+            return []
+        text = text.lower()
+        hits = []
+        for match in regex.finditer(text):
+            start, end = match.span()
+            self._add_hits(hits, text, match.group(), start, lookup)
+            # Keywords nested in this hit ("alpha" in "project_alpha") start
+            # inside the span; only these few positions are tried again
+            for inner in range(start + 1, end):
+                nested = regex.match(text, inner)
+                if nested:
+                    self._add_hits(hits, text, nested.group(), inner, lookup)
+        hits.sort(key=lambda h: h[2])
+        return hits
+
+    def _add_hits(self, hits: list, text: str, matched: str, start: int, lookup: dict):
+        # The regex returns the longest keyword at `start`; shorter ones there are its prefixes
+        for length in range(len(matched), 0, -1):
+            entry = lookup.get(matched[:length])
+            if entry is None:
+                continue
+            if length < len(matched) and self.word_boundaries and not _AT_WORD_END.match(text, start + length):
+                continue
+            hits.append((entry[0], entry[1], start, entry[2]))
+
+    def best(self, text: str):
+        """
+        The highest-priority keyword in the text, or None. Among equal
+        priorities the one listed first wins, wherever it is in the text,
+        as when the keywords were checked one after another.
+        """
+        hits = self._find(text)
+        if not hits:
+            return None
+        return max(hits, key=lambda h: (h[1], -h[3]))[0]
+
+    @property
+    def pattern(self):
+        """The compiled regex (picklable, matches lowercase text), e.g. to stop OCR early in a worker process."""
+        self._maybe_reload()
+        return self._compiled[0]
+
+    def __len__(self):
+        return len(self._compiled[1])
@@ -0,0 +1,44 @@
+import threading
+
+
+class MemoryBudget:
+    """
+    Admits jobs only while their expected memory use fits under `limit` bytes.
+
+    Callers ask for an estimate before starting a job and hand it back when
+    the job ends, so the total held by running jobs stays under the limit
+    however large the inputs are. A job bigger than the whole budget is still
+    admitted, but only once nothing else is running, so it cannot starve.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.running = 0
+        self.waits = 0  # Jobs that had to wait for room
+        self._cond = threading.Condition()
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.running == 0 or self.in_use + nbytes <= self.limit
+
+    def acquire(self, nbytes: int, timeout: float = None) -> bool:
+        """Blocks until `nbytes` fit. Returns False if `timeout` ran out first."""
+        with self._cond:
+            if not self._fits(nbytes):
+                self.waits += 1
+                if not self._cond.wait_for(lambda: self._fits(nbytes), timeout):
+                    return False
+            self.in_use += nbytes
+            self.running += 1
+            return True
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self.in_use -= nbytes
+            self.running -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"limit": self.limit, "in_use": self.in_use,
+                    "running": self.running, "waits": self.waits}
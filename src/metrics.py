@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PREFIX = "desktop_cleaner"
+
+# Latency bucket upper bounds in seconds, from a cached lookup to a slow OCR
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (an estimate)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    """
+    In-process counters and per-stage latency histograms.
+
+    Cheap enough to call on every file: one lock and a few additions. Gauges
+    such as queue depths are pulled from registered collector functions
+    when a snapshot is taken, so they cost nothing in between.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self._collectors = []
+        self._exporter = None
+        self._server = None
+
+    # --- Recording ---
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timed(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def add_collector(self, func):
+        """`func()` returns {gauge name: value}; it is called on every snapshot."""
+        self._collectors.append(func)
+
+    def remove_collector(self, func):
+        if func in self._collectors:
+            self._collectors.remove(func)
+
+    # --- Reading ---
+    def gauges(self) -> dict:
+        values = {}
+        for func in list(self._collectors):
+            try:
+                values.update(func())
+            except Exception:
+                pass
+        return values
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": h.count,
+                    "mean_ms": round(h.sum / h.count * 1000, 2) if h.count else 0.0,
+                    "p50_ms": h.quantile(0.50) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                    "p99_ms": h.quantile(0.99) * 1000,
+                }
+                for name, h in self.histograms.items()
+            }
+            counters = dict(self.counters)
+        return {"counters": counters, "stages": stages, "gauges": self.gauges()}
+
+    def to_prometheus(self) -> str:
+        lines = [f"# TYPE {PREFIX}_events_total counter"]
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'{PREFIX}_events_total{{event="{name}"}} {value}')
+            lines.append(f"# TYPE {PREFIX}_stage_seconds histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                bounds = [str(b) for b in h.buckets] + ["+Inf"]
+                for bound, n in zip(bounds, h.counts):
+                    cumulative += n
+                    lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        lines.append(f"# TYPE {PREFIX}_gauge gauge")
+        for name, value in sorted(self.gauges().items()):
+            lines.append(f'{PREFIX}_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    # --- Exporting ---
+    def write_prometheus(self, path: Path):
+        """Writes the Prometheus text format atomically (for node_exporter's textfile collector)."""
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def start_file_export(self, path: Path, interval: float = 10.0):
+        """Rewrites `path` every `interval` seconds from a daemon thread."""
+        if self._exporter is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.write_prometheus(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        self._exporter = threading.Thread(target=loop, name="metrics-export", daemon=True)
+        self._exporter.start()
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Serves GET /metrics on localhost in the background."""
+        if self._server is not None:
+            return
+        # Imported here: http.server is slow to import and most runs never serve
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Keep scrapes out of the console
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+# Shared registry for the whole process
+METRICS = Metrics()
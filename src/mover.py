@@ -0,0 +1,453 @@
+import errno
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+_PARTIAL_TAG = ".dcpart-"  # Temp copies are named ".<name>.dcpart-<move id>"
+# Link the symlink itself, not what it points to, where the platform lets us choose
+_LINK_OPTS = {"follow_symlinks": False} if os.link in os.supports_follow_symlinks else {}
+# link() errors that mean "no hardlinks on this filesystem" rather than a real failure
+_NO_LINKS = {errno.EPERM, errno.EINVAL, errno.ENOSYS, errno.EMLINK, errno.EOPNOTSUPP,
+             getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+def _try_lock(path: Path):
+    """Non-blocking exclusive lock on `path`. Returns the open fd, or None if someone else has it."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except ImportError:
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+
+def _publish(src: Path, dst: Path):
+    """
+    Renames `src` to `dst` without ever replacing an existing `dst`.
+
+    os.rename silently overwrites on POSIX, so the new name is made with a
+    hardlink (which fails with FileExistsError if it is taken) and the old
+    name removed afterwards. Raises EXDEV across filesystems, like rename.
+    """
+    try:
+        os.link(src, dst, **_LINK_OPTS)
+    except OSError as e:
+        if isinstance(e, FileExistsError) or e.errno not in _NO_LINKS:
+            raise
+        # No hardlinks here (FAT, some network shares). Windows' rename never
+        # replaces; elsewhere only a file created after this check can be lost
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+        os.rename(src, dst)
+        return
+    try:
+        os.unlink(src)
+    except OSError:
+        # e.g. the file is open in another program on Windows: leave it where it was
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        raise
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+class MoveJournal:
+    """
+    Append-only log of moves, one JSON object per line.
+
+    Records are written straight away but fsync'ed in groups: a background
+    thread syncs whatever has been appended every `commit_interval` seconds,
+    and callers that need durability wait for the sync covering their record
+    instead of paying for one fsync each.
+    """
+
+    def __init__(self, path: Path, commit_interval: float = 0.05):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_interval = commit_interval
+        self._repair_tail()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._pending = threading.Condition(self._lock)
+        self._written = 0   # Sequence number of the last record written
+        self._durable = 0   # Sequence number of the last record fsync'ed
+        self._closed = False
+        self._thread = threading.Thread(target=self._commit_loop, name="journal-commit", daemon=True)
+        self._thread.start()
+
+    def _repair_tail(self):
+        # A crash mid-write leaves a partial last line; cut it off so new records start clean
+        try:
+            with open(self.path, "rb+") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size == 0:
+                    return
+                f.seek(max(0, size - 64 * 1024))
+                tail = f.read()
+                if tail.endswith(b"\n"):
+                    return
+                cut = tail.rfind(b"\n")
+                f.truncate(size - len(tail) + cut + 1 if cut >= 0 else size - len(tail))
+        except FileNotFoundError:
+            pass
+
+    def append(self, record: dict) -> int:
+        """Writes a record and returns its sequence number (see wait_durable)."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            os.write(self._fd, line)
+            self._written += 1
+            self._pending.notify()
+            return self._written
+
+    def wait_durable(self, seq: int):
+        """Blocks until record `seq` has been fsync'ed by a group commit."""
+        with self._lock:
+            while self._durable < seq and not self._closed:
+                self._synced.wait()
+
+    def _commit_loop(self):
+        while True:
+            with self._lock:
+                # Sleep until there is something to sync
+                while self._written == self._durable and not self._closed:
+                    self._pending.wait()
+                if self._closed:
+                    return
+            time.sleep(self.commit_interval)  # Let more records join this group
+            with self._lock:
+                if self._closed:
+                    return
+                target = self._written
+                fd = self._fd
+            os.fsync(fd)  # Outside the lock so appends keep flowing
+            with self._lock:
+                self._durable = max(self._durable, target)
+                self._synced.notify_all()
+
+    def read(self) -> list:
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break  # Torn last line from a crash; everything after it is unusable
+        except FileNotFoundError:
+            pass
+        return records
+
+    def rewrite(self, records: list):
+        """Atomically replaces the journal with `records` (used to compact it)."""
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            os.replace(tmp, self.path)
+            os.close(self._fd)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            os.fsync(self._fd)
+            self._durable = self._written
+            self._closed = True
+            self._synced.notify_all()
+            self._pending.notify_all()
+            os.close(self._fd)
+
+
+def _copy_data(src_fd: int, dst_fd: int):
+    """Copies file contents inside the kernel where the platform allows it."""
+    if hasattr(os, "copy_file_range"):  # Linux: may even be a server-side or reflink copy
+        try:
+            while os.copy_file_range(src_fd, dst_fd, 1 << 30):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+            os.lseek(src_fd, 0, os.SEEK_SET)
+            os.ftruncate(dst_fd, 0)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+    if hasattr(os, "sendfile"):
+        try:
+            offset = 0
+            while True:
+                sent = os.sendfile(dst_fd, src_fd, offset, 1 << 30)
+                if not sent:
+                    return
+                offset += sent
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                raise
+            os.lseek(src_fd, 0, os.SEEK_SET)
+            os.ftruncate(dst_fd, 0)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+    while True:
+        chunk = os.read(src_fd, 1024 * 1024)
+        if not chunk:
+            return
+        os.write(dst_fd, chunk)
+
+
+class MoveEngine:
+    """
+    Moves files crash-safely, including across filesystems.
+
+    Same filesystem: a hardlink to the new name, then the old name is
+    removed. Different filesystem (e.g. a redirected Desktop): the data is
+    copied in the kernel into a hidden temp name next to the target,
+    fsync'ed, published the same way, and only then is the source removed,
+    after the journal entry is durable. A move never replaces a file that
+    is already at the target: it fails with FileExistsError instead.
+
+    Every move is journaled, so on start-up `recover` finishes or rolls back
+    whatever a crash interrupted, and `undo` can put files back in bulk.
+    `link` (duplicates sharing their original's data) is journaled the same way.
+    """
+
+    COMPACT_BYTES = 8 * 1024 * 1024  # Journal size that triggers compaction on start-up
+    KEEP_RECORDS = 20000             # Completed moves kept after compaction (for undo)
+
+    def __init__(self, journal_path: Path):
+        self.journal = MoveJournal(journal_path)
+        # Unique across processes sharing the journal: the low 16 bits are the pid
+        self._ids = itertools.count((int(time.time() * 1000) << 16) | (os.getpid() & 0xFFFF), 1 << 16)
+        # Only the first engine (across processes) replays the journal; the
+        # others could otherwise "recover" moves that are still in progress
+        self._owner_fd = _try_lock(Path(journal_path).with_suffix(".lock"))
+        if self._owner_fd is not None:
+            self.recover()
+
+    def _next_id(self) -> str:
+        return format(next(self._ids), "x")
+
+    # --- Moving ---
+    def _begin(self, src: Path, dst: Path, **extra) -> tuple:
+        """Journals the start of a move. Returns (move id, temp name for a copy)."""
+        move_id = self._next_id()
+        tmp = dst.with_name(f".{dst.name}{_PARTIAL_TAG}{move_id}")
+        # Absolute, so recovery and undo (filtered by root) don't depend on the working directory
+        record = {"op": "begin", "id": move_id, "src": os.path.abspath(src), "dst": os.path.abspath(dst),
+                  "tmp": os.path.abspath(tmp), "t": time.time()}
+        record.update((k, v) for k, v in extra.items() if v)
+        self.journal.append(record)
+        return move_id, tmp
+
+    def move(self, src: Path, dst: Path, undo_of: str = None, copy: bool = False) -> Path:
+        """Moves `src` to `dst`. With `copy`, the data is copied even on the same filesystem."""
+        src, dst = Path(src), Path(dst)
+        move_id, tmp = self._begin(src, dst, undo_of=undo_of)
+        if copy:
+            self._copy_across(src, dst, tmp, move_id)
+        else:
+            try:
+                _publish(src, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    self.journal.append({"op": "abort", "id": move_id})
+                    raise
+                self._copy_across(src, dst, tmp, move_id)
+        self.journal.append({"op": "done", "id": move_id})
+        return dst
+
+    def link(self, src: Path, original: Path, dst: Path) -> Path:
+        """
+        Replaces `src`, a duplicate of `original`, with a hardlink to `original`
+        named `dst`, so the duplicate takes no space. Journaled like a move;
+        undo puts a separate copy back at `src`. Raises FileExistsError if
+        `dst` is taken, and leaves everything as it was on any error.
+        """
+        src, original, dst = Path(src), Path(original), Path(dst)
+        move_id, _ = self._begin(src, dst, link=os.path.abspath(original))
+        try:
+            os.link(original, dst, **_LINK_OPTS)
+        except OSError:
+            self.journal.append({"op": "abort", "id": move_id})
+            raise
+        try:
+            os.unlink(src)
+        except OSError:
+            # e.g. the duplicate is open in another program on Windows
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+            self.journal.append({"op": "abort", "id": move_id})
+            raise
+        self.journal.append({"op": "done", "id": move_id})
+        return dst
+
+    def _copy_across(self, src: Path, dst: Path, tmp: Path, move_id: str):
+        try:
+            src_fd = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                dst_fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+                try:
+                    _copy_data(src_fd, dst_fd)
+                    os.fsync(dst_fd)
+                finally:
+                    os.close(dst_fd)
+            finally:
+                os.close(src_fd)
+            shutil.copystat(src, tmp)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            self.journal.append({"op": "abort", "id": move_id})
+            raise
+
+        # The copy is complete on disk; once the journal says so, a crash from
+        # here on is rolled forward by recover() instead of back
+        self.journal.wait_durable(self.journal.append({"op": "copied", "id": move_id}))
+        try:
+            _publish(tmp, dst)  # Readers see nothing or the whole file
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            self.journal.append({"op": "abort", "id": move_id})
+            raise
+        os.unlink(src)
+
+    # --- Crash recovery ---
+    def _pending(self, records: list) -> dict:
+        moves = {}
+        for record in records:
+            op, move_id = record.get("op"), record.get("id")
+            if op == "begin":
+                moves[move_id] = dict(record, state="begin")
+            elif move_id in moves:
+                moves[move_id]["state"] = op
+        return moves
+
+    def recover(self):
+        """Finishes or rolls back moves that a crash left half done."""
+        records = self.journal.read()
+        for move_id, move in self._pending(records).items():
+            if move["state"] in ("done", "abort", "undone"):
+                continue
+            src, dst, tmp = Path(move["src"]), Path(move["dst"]), Path(move["tmp"])
+            try:
+                if move["state"] == "copied":
+                    # A full, synced copy exists: finish publishing it
+                    outcome = "done"
+                    if _same_file(tmp, dst):
+                        os.unlink(tmp)  # Published, but the temp name was not removed yet
+                    elif tmp.exists():
+                        try:
+                            _publish(tmp, dst)
+                        except FileExistsError:
+                            if not src.exists():
+                                raise  # The copy is all that is left; keep it
+                            os.unlink(tmp)  # The name was taken meanwhile; keep the source
+                            outcome = "abort"
+                    if outcome == "done" and dst.exists() and src.exists():
+                        os.unlink(src)
+                elif move.get("link"):
+                    # A duplicate being replaced by a link: it is removed last
+                    if src.exists():
+                        if _same_file(dst, Path(move["link"])):
+                            os.unlink(dst)
+                        outcome = "abort"
+                    else:
+                        outcome = "done" if dst.exists() else "abort"
+                elif _same_file(src, dst):
+                    # Linked under the new name but the old one not removed yet
+                    os.unlink(src)
+                    outcome = "done"
+                elif src.exists():
+                    # Never got past the copy: the source is still the real file
+                    if tmp.exists():
+                        os.unlink(tmp)
+                    outcome = "abort"
+                else:
+                    outcome = "done" if dst.exists() else "abort"  # The rename went through (or both are gone)
+            except OSError as e:
+                print(f"Could not recover move {src} -> {dst}: {e}")
+                continue
+            self.journal.append({"op": outcome, "id": move_id, "recovered": True})
+
+        try:
+            if self.journal.path.stat().st_size > self.COMPACT_BYTES:
+                self._compact()
+        except OSError:
+            pass
+
+    def _compact(self):
+        moves = self._pending(self.journal.read())
+        kept = [m for m in moves.values()
+                if m["state"] == "done" and not m.get("undo_of")][-self.KEEP_RECORDS:]
+        records = []
+        for move in kept:
+            records.append({k: move[k] for k in ("id", "src", "dst", "tmp", "t", "link") if k in move}
+                           | {"op": "begin"})
+            records.append({"op": "done", "id": move["id"]})
+        self.journal.rewrite(records)
+
+    # --- Undo ---
+    def history(self, since: float = None, root: Path = None) -> list:
+        """Completed moves that have not been undone, oldest first. `root` keeps only moves into that folder."""
+        moves = self._pending(self.journal.read())
+        done = [m for m in moves.values() if m["state"] == "done" and not m.get("undo_of")]
+        if since is not None:
+            done = [m for m in done if m.get("t", 0) >= since]
+        if root is not None:
+            # The journal is shared by every folder ever cleaned
+            root = Path(os.path.abspath(root))
+            done = [m for m in done if root in Path(os.path.abspath(m["dst"])).parents]
+        return done
+
+    def undo(self, count: int = None, since: float = None, root: Path = None) -> int:
+        """Moves the last `count` files (or everything since `since`) back. Returns how many."""
+        moves = self.history(since, root)
+        if count is not None:
+            moves = moves[-count:] if count else []
+        undone = 0
+        for move in reversed(moves):
+            src, dst = Path(move["src"]), Path(move["dst"])
+            if not dst.exists() or src.exists():
+                continue  # Moved or replaced since; leave it alone
+            try:
+                # A linked duplicate shares its original's data; put back a separate copy
+                self.move(dst, src, undo_of=move["id"], copy="link" in move)
+            except OSError as e:
+                print(f"Could not undo {dst.name}: {e}")
+                continue
+            self.journal.append({"op": "undone", "id": move["id"]})
+            undone += 1
+        return undone
+
+    def close(self):
+        self.journal.close()
+        if self._owner_fd is not None:
+            os.close(self._owner_fd)
+            self._owner_fd = None
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class OCRCache:
+    """
+    On-disk cache of OCR results, keyed by a hash of the file contents.
+
+    A cheap (device, inode, size, mtime) lookup is tried first so an
+    unchanged file is never re-read to be hashed. Stored text is bounded by
+    `max_bytes` and the least recently used entries are evicted first.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, db_path: Path, max_bytes: int = 64 * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Sweep workers share this file, so wait on a busy database rather than fail
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, hash TEXT,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr ("
+            " hash TEXT PRIMARY KEY, text TEXT, nbytes INTEGER, last_used REAL,"
+            " complete INTEGER DEFAULT 1)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(ocr)")]
+        if "complete" not in columns:  # Cache written before progressive OCR
+            self._conn.execute("ALTER TABLE ocr ADD COLUMN complete INTEGER DEFAULT 1")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_lru ON ocr (last_used)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM ocr").fetchone()
+        self._total_bytes = row[0]
+
+    # --- Keys ---
+    def key_for(self, file_path: Path, stat_result=None) -> str:
+        """Returns the content hash of a file, reusing a stored hash when the stat matches."""
+        st = stat_result or os.stat(file_path)
+        stat_key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM files WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                stat_key,
+            ).fetchone()
+        if row:
+            return row[0]
+
+        digest = self._hash_file(file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (*stat_key, digest)
+            )
+            self._conn.commit()
+        return digest
+
+    def _hash_file(self, file_path: Path) -> str:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    # --- Lookups ---
+    def get(self, key: str):
+        """
+        Returns (lowercase text, complete) for `key`, or None on a miss.
+        `complete` is False when OCR stopped early, so the text is only a prefix.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT text, complete FROM ocr WHERE hash=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE ocr SET last_used=? WHERE hash=?", (time.time(), key))
+            self._conn.commit()
+            return row[0], bool(row[1])
+
+    def put(self, key: str, text: str, complete: bool = True):
+        nbytes = len(text.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT nbytes FROM ocr WHERE hash=?", (key,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr (hash, text, nbytes, last_used, complete)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, text, nbytes, time.time(), int(complete)),
+            )
+            self._total_bytes += nbytes
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop the least recently used entries until we are back under budget
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT hash, nbytes FROM ocr ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                break
+            self._conn.execute("DELETE FROM ocr WHERE hash=?", (row[0],))
+            self._conn.execute("DELETE FROM files WHERE hash=?", (row[0],))
+            self._total_bytes -= row[1]
+
+    # --- Reporting ---
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ocr").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": self._total_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,368 @@
+import importlib.util
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
+# Its own class before Python 3.11 (an alias of the builtin from then on)
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from pathlib import Path
+from src.memory_budget import MemoryBudget
+from src.metrics import METRICS
+
+# Per-process Tesseract handle. Set up once by _init_worker so the language
+# model stays loaded between images instead of being reloaded for each one.
+_tess_api = None
+
+
+@dataclass(frozen=True)
+class OCROptions:
+    lang: str = "eng"
+    timeout: float = 30.0        # Hard limit per image
+    progressive: bool = True     # OCR in bands and stop at the first keyword
+    time_budget: float = 8.0     # Soft limit: stop starting new bands after this
+    max_side: int = 2400         # Longest side after downscaling, in pixels
+    target_dpi: int = 300        # Scans above this DPI are scaled down to it
+    band_height: int = 600       # Progressive mode: rows per band
+    band_overlap: int = 40       # Rows shared by neighbouring bands, so no text line is cut
+    max_pixels: int = 80_000_000  # Most pixels decoded per image; larger ones are refused (decompression bombs)
+
+
+# Held by all OCR jobs at once, in bytes; see OCREngine
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+# Rough bytes per pixel of the prepared image used by Tesseract while it works
+_TESSERACT_BYTES_PER_PIXEL = 8
+# JPEG draft mode decodes at down to 1/8 of each side
+_MAX_DRAFT_SCALE = 8
+
+
+def _init_worker(lang: str, max_pixels: int = OCROptions.max_pixels):
+    global _tess_api
+    # Import the heavy modules once per worker instead of once per image
+    from PIL import Image
+    import pytesseract  # noqa: F401
+    # Pillow's own bomb check (it raises at twice this) as a backstop to _open_bounded.
+    # It looks at the header size, so it must let through JPEGs that draft mode shrinks under the cap
+    Image.MAX_IMAGE_PIXELS = max_pixels * _MAX_DRAFT_SCALE ** 2
+    try:
+        # Opt-in (see README): Tesseract in-process with the model kept loaded.
+        # Without it pytesseract starts a tesseract process per call (per band
+        # in progressive mode), which reloads the model every time
+        import tesserocr
+        _tess_api = tesserocr.PyTessBaseAPI(lang=lang)
+    except Exception:
+        _tess_api = None
+
+
+def _noop():
+    return None
+
+
+def _recognize(image, lang: str, timeout: float) -> str:
+    if _tess_api is not None:
+        _tess_api.SetImage(image)
+        # Same contract as pytesseract: RuntimeError once the time is up
+        if not _tess_api.Recognize(timeout=max(1, int(timeout * 1000))):
+            raise RuntimeError("Tesseract timed out")
+        return _tess_api.GetUTF8Text()
+    import pytesseract
+    return pytesseract.image_to_string(image, lang=lang, timeout=timeout)
+
+
+def _target_size(size: tuple, dpi, opts: OCROptions) -> tuple:
+    """The size Tesseract reads well: at most target_dpi and max_side, never larger than `size`."""
+    width, height = size
+    scale = 1.0
+    if dpi and dpi[0] > opts.target_dpi:
+        scale = opts.target_dpi / float(dpi[0])
+    long_side = max(width, height)
+    if long_side * scale > opts.max_side:
+        scale = opts.max_side / long_side
+    if scale >= 1.0:
+        return size
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _draft_size(size: tuple, target: tuple) -> tuple:
+    """The size a JPEG draft for `target` decodes to: the scale Pillow picks (1, 1/2, 1/4 or 1/8), rounded up."""
+    width, height = size
+    ratio = min(width // target[0], height // target[1])
+    scale = next(s for s in (_MAX_DRAFT_SCALE, 4, 2, 1) if ratio >= s)
+    return -(-width // scale), -(-height // scale)
+
+
+def _open_header(path: str):
+    from PIL import Image
+
+    # Sizes are checked against our own max_pixels; Pillow's warning would only repeat it
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        return Image.open(path)
+
+
+def _open_bounded(path: str, opts: OCROptions):
+    """
+    Opens an image without decoding more pixels than needed. Returns (image, target size).
+
+    Only the header is read here. JPEGs are decoded straight to grayscale
+    at 1/2, 1/4 or 1/8 scale when the target is that much smaller, and
+    `max_pixels` applies to the size that will actually be decoded: an image
+    is refused, before any pixel data is read, only if it cannot be brought
+    under the cap.
+    """
+    image = _open_header(path)
+    target = _target_size(image.size, image.info.get("dpi"), opts)
+    if image.format == "JPEG" and target != image.size:
+        image.draft("L", target)  # Picks the smallest DCT scale still >= target
+    width, height = image.size  # After draft: what decoding will produce
+    if width * height > opts.max_pixels:
+        image.close()
+        raise ValueError(f"{width}x{height} image is over the {opts.max_pixels} pixel limit")
+    return image, target
+
+
+def _prepare(image, target: tuple):
+    """Grayscale and shrink to `target`; never upscales."""
+    from PIL import Image
+
+    # Cheap integer box reduction first, so the colour conversion and the
+    # LANCZOS pass work on the small image instead of the full decode
+    factor = min(image.width // target[0], image.height // target[1])
+    if factor >= 2:
+        image = image.reduce(factor)
+    image = image.convert("L")
+    if image.size != target:
+        image = image.resize(target, Image.LANCZOS)
+    return image
+
+
+def _decode_cost(path: str, opts: OCROptions) -> int:
+    """Bytes an OCR job on this image is expected to hold at its peak (header read only)."""
+    try:
+        with _open_header(path) as image:
+            width, height = image.size
+            bands = len(image.getbands())
+            jpeg = image.format == "JPEG"
+            dpi = image.info.get("dpi")
+    except Exception:
+        # Not something Pillow can size up; assume a full-size prepared page
+        return opts.max_side * opts.max_side * (4 + _TESSERACT_BYTES_PER_PIXEL)
+    target_w, target_h = _target_size((width, height), dpi, opts)
+    if jpeg and (target_w, target_h) != (width, height):
+        # Draft mode decodes to grayscale at up to 1/8 scale
+        width, height = _draft_size((width, height), (target_w, target_h))
+        bands = 1
+    if width * height > opts.max_pixels:
+        return 0  # Refused before decoding (same rule as _open_bounded)
+    return width * height * bands + target_w * target_h * (1 + _TESSERACT_BYTES_PER_PIXEL)
+
+
+def _bands(height: int, band_height: int, overlap: int):
+    top = 0
+    while True:
+        bottom = min(height, top + band_height)
+        yield top, bottom
+        if bottom >= height:
+            return
+        top = bottom - overlap
+
+
+def _ocr_progressive(image, opts: OCROptions, stop_pattern):
+    """
+    OCRs the image band by band from the top. Returns (text, complete) where
+    complete is False if we stopped early on a keyword hit or the time budget.
+    """
+    started = time.monotonic()
+    width, height = image.size
+    parts = []
+    text = ""
+    for top, bottom in _bands(height, opts.band_height, opts.band_overlap):
+        remaining = opts.time_budget - (time.monotonic() - started)
+        if remaining <= 0:
+            return text, False
+        try:
+            parts.append(_recognize(image.crop((0, top, width, bottom)), opts.lang,
+                                    min(remaining, opts.timeout)))
+        except RuntimeError:
+            return text, False  # pytesseract raises this when a band times out
+        text = "\n".join(parts).lower()
+        if stop_pattern is not None and stop_pattern.search(text):
+            return text, False
+    return text, True
+
+
+def _ocr_file(path: str, opts: OCROptions, stop_pattern=None):
+    image, target = _open_bounded(path, opts)
+    with image:
+        prepared = _prepare(image, target)
+    # The full decode is closed here; only the small grayscale copy is kept
+    if opts.progressive:
+        return _ocr_progressive(prepared, opts, stop_pattern)
+    return _recognize(prepared, opts.lang, opts.timeout).lower(), True
+
+
+def _ocr_pdf_page(path: str, page_index: int, opts: OCROptions, stop_pattern=None):
+    """Renders one PDF page (and only that page) and OCRs it."""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[page_index]
+        width, height = page.get_size()  # In points (1/72 inch)
+        scale = opts.target_dpi / 72.0
+        if max(width, height) * scale > opts.max_side:
+            scale = opts.max_side / max(width, height)
+        image = page.render(scale=scale, grayscale=True).to_pil()
+        page.close()
+    finally:
+        pdf.close()
+
+    if opts.progressive:
+        return _ocr_progressive(image, opts, stop_pattern)
+    return _recognize(image, opts.lang, opts.timeout).lower(), True
+
+
+class OCREngine:
+    """
+    Pool of warm OCR worker processes.
+
+    Images are sent as paths (each worker opens its own copy) and results come
+    back as futures of (lowercase text, complete). With `workers=0` OCR runs
+    inline in the calling process, which is what the sweep workers use since
+    they are already a process pool.
+
+    Each job is admitted against a shared memory budget sized from the image
+    header, so however large the images are, the workers together hold at
+    most about `memory_budget` bytes of pixels.
+
+    Workers only avoid starting a tesseract process per image when the
+    optional tesserocr package is installed; otherwise they use pytesseract.
+    """
+
+    def __init__(self, workers: int = None, options: OCROptions = None,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.options = options or OCROptions()
+        self.budget = MemoryBudget(memory_budget)
+        self._executor = None
+        self._inline_ready = False
+        self._inline_lock = threading.Lock()
+        self._executor_lock = threading.Lock()
+
+    @property
+    def timeout(self) -> float:
+        return self.options.timeout
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started on first use so creating a FileCleaner stays cheap
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.options.lang, self.options.max_pixels),
+                )
+            return self._executor
+
+    def warm_up(self):
+        """Starts the workers and loads Tesseract now instead of on the first image."""
+        if importlib.util.find_spec("tesserocr") is None:
+            print("OCR: tesserocr is not installed, so every image starts a tesseract process "
+                  "(pip install tesserocr to keep it loaded)")
+        if self.workers == 0:
+            self._submit(_noop).result()
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def _submit(self, func, *args) -> Future:
+        if self.workers == 0:
+            future = Future()
+            try:
+                # One shared Tesseract handle, so inline calls take turns
+                with self._inline_lock:
+                    if not self._inline_ready:
+                        _init_worker(self.options.lang, self.options.max_pixels)
+                        self._inline_ready = True
+                    result = func(*args)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._get_executor().submit(func, *args)
+
+    def _submit_within_budget(self, cost: int, func, *args) -> Future:
+        # Waits for room in the memory budget for as long as it takes: giving up
+        # would file the image by its MIME type without reading it. Room always
+        # comes back, since a running job ends within `timeout` or its pool is
+        # recycled (_recycle_if_stuck), and that fails the job's future
+        self.budget.acquire(cost)  # Waits are counted in budget.stats()
+        try:
+            future = self._submit(func, *args)
+        except BaseException:
+            self.budget.release(cost)
+            raise
+        future.add_done_callback(lambda _: self.budget.release(cost))
+        return future
+
+    def _wait(self, future: Future) -> tuple:
+        executor = self._executor
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if not future.cancel() and executor is not None:
+                # Already running, so cancel() cannot stop it. It may only just
+                # have left the queue: give it one more timeout, then kill the pool
+                timer = threading.Timer(self.timeout, self._recycle_if_stuck, args=(future, executor))
+                timer.daemon = True
+                timer.start()
+            raise
+        except Exception:
+            future.cancel()
+            raise
+
+    def _recycle_if_stuck(self, future: Future, executor: ProcessPoolExecutor):
+        with self._executor_lock:
+            if future.done() or self._executor is not executor:
+                return
+            self._executor = None  # The next job starts a fresh pool
+        METRICS.inc("ocr_pool_recycled")
+        terminate = getattr(executor, "terminate_workers", None)  # Python 3.14+
+        if terminate is not None:
+            terminate()
+            return
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, file_path: Path, stop_pattern=None) -> Future:
+        """
+        Queues an image for OCR. In progressive mode, `stop_pattern` (a compiled
+        regex) ends the scan as soon as it matches the text read so far.
+        """
+        cost = _decode_cost(str(file_path), self.options)
+        return self._submit_within_budget(cost, _ocr_file, str(file_path), self.options, stop_pattern)
+
+    def submit_pdf_page(self, file_path: Path, page_index: int, stop_pattern=None) -> Future:
+        """Queues a single scanned PDF page for rendering and OCR."""
+        # Pages are rendered straight to grayscale at no more than max_side
+        cost = self.options.max_side * self.options.max_side * (1 + _TESSERACT_BYTES_PER_PIXEL)
+        return self._submit_within_budget(cost, _ocr_pdf_page, str(file_path), page_index,
+                                          self.options, stop_pattern)
+
+    def image_to_text(self, file_path: Path, stop_pattern=None) -> tuple:
+        """Blocking helper returning (text, complete). Raises TimeoutError past `timeout`."""
+        return self._wait(self.submit(file_path, stop_pattern))
+
+    def pdf_page_to_text(self, file_path: Path, page_index: int, stop_pattern=None) -> tuple:
+        """Blocking helper returning (text, complete) for one PDF page."""
+        return self._wait(self.submit_pdf_page(file_path, page_index, stop_pattern))
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
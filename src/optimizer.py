@@ -1,17 +1,80 @@
-import shutil
 import os
-import psutil
 import platform
+import threading
+import time
+from collections import deque
 from pathlib import Path
+from src.metrics import METRICS
+from src.purge import CachePurger
+
+class StatsSampler:
+    """
+    Samples CPU and RAM usage on a background thread.
+
+    Keeps a rolling window of (timestamp, cpu %, ram %) samples so the UI can
+    read the latest value or the recent history without ever blocking.
+    """
+
+    def __init__(self, interval=1.0, history=300):
+        self.interval = interval
+        self.samples = deque(maxlen=history)
+        self.listeners = []  # Called with every new sample, e.g. LoadGovernor.on_sample
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        import psutil  # Imported here so neither start-up nor start() waits for it
+        psutil.cpu_percent(interval=None)  # Primes the counter; the first reading is always 0
+        while not self._stop.wait(self.interval):
+            # interval=None: usage since the previous call, returns immediately
+            cpu = psutil.cpu_percent(interval=None)
+            memory = psutil.virtual_memory().percent
+            sample = (time.time(), cpu, memory)
+            self.samples.append(sample)
+            for listener in list(self.listeners):
+                listener(sample)
+
+    def latest(self):
+        """The newest (timestamp, cpu, ram) sample, or None before the first one."""
+        return self.samples[-1] if self.samples else None
+
+    def series(self, seconds=None) -> list:
+        """Samples from the last `seconds` (all of them by default), oldest first."""
+        samples = list(self.samples)
+        if seconds is None:
+            return samples
+        cutoff = time.time() - seconds
+        return [s for s in samples if s[0] >= cutoff]
+
 
 class SystemOptimizer:
     def __init__(self):
         self.os_type = platform.system()
+        self.purger = CachePurger()
+        self.sampler = StatsSampler()
         
     def get_system_stats(self):
-        """Returns a string with current CPU and RAM usage."""
-        cpu = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory().percent
+        """Returns a string with current CPU and RAM usage (never blocks)."""
+        sample = self.sampler.latest()
+        if sample:
+            _, cpu, memory = sample
+        else:
+            import psutil
+            cpu = psutil.cpu_percent(interval=None)
+            memory = psutil.virtual_memory().percent
         return f"CPU: {cpu}% | RAM: {memory}%"
 
     def get_cache_paths(self):
@@ -27,36 +90,35 @@ class SystemOptimizer:
             
         elif self.os_type == "Windows":
             # The Temp folder on Windows
-            paths.append(Path(os.environ.get('TEMP')))
+            if os.environ.get('TEMP'):
+                paths.append(Path(os.environ['TEMP']))
             # Windows Prefetch (Requires Admin, maybe skip for now)
+
+        elif self.os_type == "Linux":
+            # XDG cache folder (~/.cache unless the user moved it)
+            xdg_cache = os.environ.get('XDG_CACHE_HOME')
+            paths.append(Path(xdg_cache) if xdg_cache else user_home / ".cache")
         
         return paths
 
-    def run_speed_up(self):
-        """Deletes temporary files to free space/resources."""
-        cleaned_size_mb = 0
-        cache_folders = self.get_cache_paths()
-        logs = []
+    def run_speed_up(self, dry_run=False, progress_func=None, cancel_event=None):
+        """
+        Deletes temporary files to free space/resources (or just measures them).
+        Safe to call from a worker thread: progress_func(bytes_freed, files) reports
+        along the way and setting cancel_event stops early.
+        """
+        cache_folders = [f for f in self.get_cache_paths() if f.exists()]
 
-        for folder in cache_folders:
-            if not folder.exists():
-                continue
-            
-            # Walk through the folder and delete contents
-            for item in folder.iterdir():
-                try:
-                    if item.is_file():
-                        size = item.stat().st_size
-                        item.unlink() # Delete file
-                        cleaned_size_mb += size
-                    elif item.is_dir():
-                        size = sum(f.stat().st_size for f in item.glob('**/*') if f.is_file())
-                        shutil.rmtree(item) # Delete folder
-                        cleaned_size_mb += size
-                except Exception:
-                    # Skip files currently in use (common in Caches)
-                    pass
-        
-        # Convert bytes to MB
-        mb_freed = round(cleaned_size_mb / (1024 * 1024), 2)
-        return f"Speed Up Complete! Freed {mb_freed} MB of junk cache."
\ No newline at end of file
+        # One pass per tree: sizes are added up while files are deleted
+        with METRICS.timed("purge"):
+            result = self.purger.purge(cache_folders, dry_run=dry_run,
+                                       progress_func=progress_func, cancel_event=cancel_event)
+        if not dry_run:
+            METRICS.inc("purged_files", result.files)
+            METRICS.inc("purged_bytes", result.bytes_freed)
+
+        if result.cancelled:
+            return f"Speed Up Cancelled. Freed {result.mb_freed} MB before stopping."
+        if dry_run:
+            return f"Speed Up Estimate: {result.mb_freed} MB of junk cache in {result.files} files can be freed."
+        return f"Speed Up Complete! Freed {result.mb_freed} MB of junk cache."
\ No newline at end of file
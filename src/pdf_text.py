@@ -0,0 +1,67 @@
+import importlib.util
+from pathlib import Path
+
+
+def pdf_rendering_available() -> bool:
+    """True if scanned pages can be rasterized for OCR (needs pypdfium2)."""
+    return importlib.util.find_spec("pypdfium2") is not None
+
+
+class PDFTextScanner:
+    """
+    Pulls text out of a PDF one page at a time.
+
+    Pages with a text layer are read directly. Pages without one (scans) are
+    rendered and OCR'd by the OCR engine, up to `max_ocr_pages` per file.
+    Reading stops at the first page that matches `stop_pattern`, and at most
+    `max_chars` of text are kept, so memory stays flat however long the PDF is.
+    """
+
+    def __init__(self, ocr_engine, max_ocr_pages: int = 5, max_chars: int = 64 * 1024,
+                 min_page_chars: int = 16):
+        self.ocr_engine = ocr_engine
+        self.max_ocr_pages = max_ocr_pages
+        self.max_chars = max_chars
+        self.min_page_chars = min_page_chars  # Fewer characters than this = scanned page
+        self._can_render = pdf_rendering_available()
+
+    def scan(self, file_path: Path, stop_pattern=None) -> tuple:
+        """Returns (lowercase text, complete), like OCREngine.image_to_text."""
+        try:
+            import pypdf  # Optional: reads the embedded text layer (imported on first PDF)
+        except ImportError:
+            raise RuntimeError("pypdf is not installed, PDF text cannot be read")
+
+        # An open file, not a path: given a path pypdf reads the whole PDF into memory
+        with open(file_path, "rb") as f:
+            reader = pypdf.PdfReader(f)
+            parts = []
+            kept = 0
+            ocr_pages = 0
+            complete = True
+
+            for index, page in enumerate(reader.pages):
+                try:
+                    page_text = page.extract_text() or ""
+                except Exception:
+                    page_text = ""  # Broken content stream; treat it like a scan
+
+                if len(page_text.strip()) < self.min_page_chars:
+                    if not self._can_render or ocr_pages >= self.max_ocr_pages:
+                        complete = False  # Skipped a scanned page
+                        continue
+                    page_text, page_complete = self.ocr_engine.pdf_page_to_text(
+                        file_path, index, stop_pattern)
+                    ocr_pages += 1
+                    # Cut short by the time budget (or a keyword): not the whole page
+                    complete = complete and page_complete
+
+                page_text = page_text.lower()
+                if kept < self.max_chars:
+                    parts.append(page_text[: self.max_chars - kept])
+                    kept += len(parts[-1])
+
+                if stop_pattern is not None and stop_pattern.search(page_text):
+                    return "\n".join(parts), False
+
+            return "\n".join(parts), complete and kept < self.max_chars
@@ -0,0 +1,293 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from src.debouncer import FileDebouncer
+from src.metrics import METRICS
+from src.probe import FileProbe
+
+_STOP = object()
+# Returned by a stage function that has parked the item elsewhere (see idle queue)
+DEFERRED = object()
+
+
+class Stage:
+    """
+    One step of the pipeline: a bounded queue drained by its own worker threads.
+
+    `func` takes an item and returns the item for the next stage, None to
+    drop it, or DEFERRED if it kept hold of the item itself. A full
+    downstream queue blocks this stage's workers, so pressure travels back
+    towards intake instead of piling up in memory.
+    """
+
+    def __init__(self, name: str, func, workers: int = 1, maxsize: int = 256):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.next_stage = None
+        self.on_done = None  # Called with each item once it leaves the stage
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, discard: bool = False) -> list:
+        """
+        Stops the workers once they finish their current item. With `discard`,
+        items still queued are dropped and returned instead of processed.
+        """
+        dropped = []
+        while discard:
+            try:
+                dropped.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        return dropped
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            with self._lock:
+                self.busy += 1
+            result = None
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"[{self.name}] failed on {item}: {e}")
+                with self._lock:
+                    self.failed += 1
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.processed += 1
+
+            if result is DEFERRED:
+                continue
+            if result is not None and self.next_stage is not None:
+                self.next_stage.queue.put(result)  # Blocks while downstream is full
+            elif self.on_done:
+                self.on_done(item)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "busy": self.busy,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+class ClassificationPipeline:
+    """
+    Intake -> stability check -> classify -> move.
+
+    Stability is handled by a FileDebouncer (one timer thread for all paths);
+    classify and move each have their own bounded queue and threads.
+    `submit` never blocks the caller: if too many paths are waiting the path
+    is rejected and counted in `dropped`.
+    """
+
+    def __init__(self, cleaner, on_moved=None, quiet_period: float = 0.5,
+                 classify_workers: int = None, queue_size: int = 256,
+                 governor=None, max_defer: float = 300.0, on_finished=None):
+        self.cleaner = cleaner
+        self.on_moved = on_moved
+        self.on_finished = on_finished  # Called with each path once the pipeline is done with it
+        # Optional LoadGovernor: files that need OCR wait in the idle queue while
+        # the machine is busy; everything else is classified straight away
+        self.governor = governor
+        self.max_defer = max_defer  # After this long a deferred file runs anyway
+        self.idle_capacity = queue_size * 4
+        self._idle = deque()  # (deferred at, path, dedup hashes)
+        self._idle_stop = threading.Event()
+        self._idle_thread = None
+        self.dropped = 0
+        self.coalesced = 0
+        self._in_flight = set()  # Paths handed to classify/move
+        self._in_flight_lock = threading.Lock()
+
+        self.debouncer = FileDebouncer(self._dispatch, quiet_period=quiet_period,
+                                       max_pending=queue_size * 4)
+
+        classify_workers = classify_workers or os.cpu_count() or 1
+        self.stages = [
+            Stage("classify", self._classify, classify_workers, queue_size),
+            # A single mover keeps collision handling race-free
+            Stage("move", self._move, 1, queue_size),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+        for stage in self.stages:
+            stage.on_done = self._release
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        self.debouncer.start()
+        if self.governor is not None:
+            self._idle_stop.clear()
+            self._idle_thread = threading.Thread(target=self._drain_idle, name="idle-ocr", daemon=True)
+            self._idle_thread.start()
+        METRICS.add_collector(self._queue_gauges)
+
+    def stop(self):
+        """
+        Returns once the files being worked on are done; queued ones are
+        dropped rather than classified (OCR could take minutes). They are never
+        reported to on_finished, so the caller can retry them on the next start.
+        """
+        METRICS.remove_collector(self._queue_gauges)
+        # Stop upstream first so nothing is pushed into a stage that has shut down
+        self.debouncer.stop()
+        dropped = self.stages[0].stop(discard=True)
+        if self._idle_thread:
+            self._idle_stop.set()
+            self._idle_thread.join()
+            self._idle_thread = None
+        dropped += [file_path for _, file_path, _ in self._idle]
+        self._idle.clear()
+        for stage in self.stages[1:]:
+            dropped += stage.stop(discard=True)
+        with self._in_flight_lock:
+            for item in dropped:
+                self._in_flight.discard(item[0] if isinstance(item, tuple) else item)
+
+    def _queue_gauges(self) -> dict:
+        gauges = {"stability_pending": self.debouncer.stats()["pending"],
+                  "idle_queue_depth": len(self._idle)}
+        if self.governor is not None:
+            gauges["ocr_limit"] = self.governor.limit
+            gauges["ocr_in_flight"] = self.governor.in_flight
+        for stage in self.stages:
+            gauges[f"{stage.name}_queue_depth"] = stage.queue.qsize()
+            gauges[f"{stage.name}_busy"] = stage.busy
+        return gauges
+
+    def submit(self, file_path: Path) -> bool:
+        """Queues a path from the watcher thread. Returns False if it was dropped."""
+        with self._in_flight_lock:
+            if file_path in self._in_flight:
+                self.coalesced += 1
+                return True
+        if not self.debouncer.touch(file_path):
+            self.dropped += 1
+            METRICS.inc("dropped")
+            return False
+        return True
+
+    def notify_closed(self, file_path: Path) -> bool:
+        """The file was closed after writing, so it can skip the quiet period."""
+        if not self.debouncer.mark_closed(file_path):
+            self.dropped += 1
+            METRICS.inc("dropped")
+            return False
+        return True
+
+    def _dispatch(self, file_path: Path) -> bool:
+        # Called by the debouncer once the file is quiet
+        with self._in_flight_lock:
+            if file_path in self._in_flight:
+                return True
+            try:
+                self.stages[0].queue.put_nowait(file_path)
+            except queue.Full:
+                return False  # Debouncer keeps it and retries later
+            self._in_flight.add(file_path)
+        return True
+
+    def _release(self, item):
+        file_path = item[0] if isinstance(item, tuple) else item
+        with self._in_flight_lock:
+            self._in_flight.discard(file_path)
+        if self.on_finished:
+            self.on_finished(file_path)
+
+    def _classify(self, file_path: Path):
+        if not file_path.exists():
+            return None
+        probe = FileProbe(file_path)
+        hashes = {}
+        original = self.cleaner.check_duplicate(file_path, probe, hashes)
+        if original is not None:
+            return (file_path, None, original, hashes)  # Same contents as a sorted file; skip classifying
+
+        if self.governor is None or not self.cleaner.wants_content_scan(file_path, probe):
+            # Filename/MIME decide it: no OCR, so no need to ask the governor
+            return (file_path, self.cleaner.identify_category(file_path, probe), None, hashes)
+
+        # A full idle queue means we are too far behind to keep deferring
+        if not self.governor.try_acquire(force=len(self._idle) >= self.idle_capacity):
+            self._idle.append((time.monotonic(), file_path, hashes))
+            METRICS.inc("ocr_deferred")
+            return DEFERRED
+        try:
+            return (file_path, self.cleaner.identify_category(file_path, probe), None, hashes)
+        finally:
+            self.governor.release()
+
+    def _drain_idle(self):
+        # Runs deferred OCR whenever the governor has a free slot
+        while not self._idle_stop.is_set():
+            if not self._idle:
+                self._idle_stop.wait(0.25)
+                continue
+            deferred_at, file_path, hashes = self._idle[0]
+            overdue = time.monotonic() - deferred_at > self.max_defer
+            if not self.governor.try_acquire(force=overdue):
+                self._idle_stop.wait(0.25)
+                continue
+
+            self._idle.popleft()
+            try:
+                category = self.cleaner.identify_category(file_path) if file_path.exists() else None
+            except Exception as e:
+                print(f"[idle-ocr] failed on {file_path}: {e}")
+                category = None
+            finally:
+                self.governor.release()
+
+            if category is None:
+                self._release(file_path)
+            else:
+                self.stages[1].queue.put((file_path, category, None, hashes))
+
+    def _move(self, item):
+        file_path, category, original, hashes = item
+        if original is not None:
+            new_path = self.cleaner.place_duplicate(file_path, original, hashes)
+        else:
+            new_path = self.cleaner.place_file(file_path, category, hashes)
+        if new_path and self.on_moved:
+            self.on_moved(file_path, Path(new_path))
+        return None
+
+    def stats(self) -> dict:
+        """Per-stage queue depths plus intake drop/coalesce counters."""
+        report = {"stability": self.debouncer.stats()}
+        report.update({stage.name: stage.stats() for stage in self.stages})
+        report["intake"] = {"in_flight": len(self._in_flight), "dropped": self.dropped,
+                            "coalesced": self.coalesced}
+        report["idle"] = {"depth": len(self._idle), "capacity": self.idle_capacity}
+        if self.governor is not None:
+            report["governor"] = self.governor.stats()
+        return report
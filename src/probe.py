@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from src.metrics import METRICS
+
+# libmagic only needs the start of a file to recognise it
+HEADER_SIZE = 8192
+
+# One libmagic handle for the whole process; loading its database is the slow part
+_magic_handle = None
+_magic_lock = threading.Lock()
+
+# MIME results by (dev, inode, size, mtime) so an unchanged file is never sniffed twice
+_MIME_MEMO_SIZE = 4096
+_mime_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _handle():
+    # Imported on first use so start-up does not pay for loading libmagic
+    global _magic_handle
+    if _magic_handle is None:
+        import magic
+        _magic_handle = magic.Magic(mime=True)
+    return _magic_handle
+
+
+def warm_up():
+    """Loads the libmagic database now, so the first real file is not the one that waits for it."""
+    with _magic_lock:
+        _handle()
+
+
+def _sniff(header: bytes) -> str:
+    with _magic_lock:
+        return _handle().from_buffer(header)
+
+
+class FileProbe:
+    """
+    Everything the classifier needs to know about a file, gathered once.
+
+    Built in move_file and passed down the classification chain so the file
+    is stat'ed once, its header read once and libmagic asked once.
+    """
+
+    def __init__(self, file_path: Path):
+        self.path = Path(file_path)
+        self.stat = os.stat(self.path)
+        self._header = None
+        self._mime = None
+
+    @property
+    def key(self) -> tuple:
+        st = self.stat
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @property
+    def header(self) -> bytes:
+        if self._header is None:
+            with open(self.path, "rb") as f:
+                self._header = f.read(HEADER_SIZE)
+        return self._header
+
+    @property
+    def mime(self) -> str:
+        if self._mime is None:
+            key = self.key
+            with _memo_lock:
+                cached = _mime_memo.get(key)
+                if cached is not None:
+                    _mime_memo.move_to_end(key)
+            if cached is None:
+                with METRICS.timed("libmagic"):
+                    cached = _sniff(self.header)
+                with _memo_lock:
+                    _mime_memo[key] = cached
+                    if len(_mime_memo) > _MIME_MEMO_SIZE:
+                        _mime_memo.popitem(last=False)
+            self._mime = cached
+        return self._mime
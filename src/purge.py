@@ -0,0 +1,145 @@
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PurgeResult:
+    def __init__(self, bytes_freed=0, files=0, errors=0):
+        self.bytes_freed = bytes_freed
+        self.files = files
+        self.errors = errors
+        self.cancelled = False
+
+    def add(self, other: "PurgeResult"):
+        self.bytes_freed += other.bytes_freed
+        self.files += other.files
+        self.errors += other.errors
+
+    @property
+    def mb_freed(self) -> float:
+        return round(self.bytes_freed / (1024 * 1024), 2)
+
+
+class _PurgeJob:
+    """State shared by the pool threads of one purge run."""
+
+    REPORT_EVERY = 0.1  # Seconds between progress callbacks
+
+    def __init__(self, dry_run: bool, progress_func=None, cancel_event=None):
+        self.dry_run = dry_run
+        self.progress_func = progress_func
+        self.cancel_event = cancel_event or threading.Event()
+        self.total = PurgeResult()
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def count(self, size: int):
+        with self._lock:
+            self.total.bytes_freed += size
+            self.total.files += 1
+            if self.progress_func is None:
+                return
+            now = time.monotonic()
+            if now - self._last_report < self.REPORT_EVERY:
+                return
+            self._last_report = now
+            bytes_freed, files = self.total.bytes_freed, self.total.files
+        self.progress_func(bytes_freed, files)
+
+    def error(self):
+        with self._lock:
+            self.total.errors += 1
+
+    def purge_entry(self, path: str):
+        if self.cancelled:
+            return
+        try:
+            st = os.lstat(path)
+        except OSError:
+            self.error()
+            return
+        if stat.S_ISDIR(st.st_mode):
+            self.purge_tree(path)
+        else:
+            self.remove_file(path, st.st_size)
+
+    def remove_file(self, path: str, size: int):
+        if not self.dry_run:
+            try:
+                os.unlink(path)
+            except OSError:
+                # Skip files currently in use (common in Caches)
+                self.error()
+                return
+        self.count(size)
+
+    def purge_tree(self, top: str):
+        # Iterative post-order walk: children first, then the emptied directory
+        stack = [(top, False)]
+        while stack and not self.cancelled:
+            path, children_done = stack.pop()
+            if children_done:
+                if not self.dry_run:
+                    try:
+                        os.rmdir(path)
+                    except OSError:
+                        pass  # Something inside could not be deleted
+                continue
+
+            stack.append((path, True))
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append((entry.path, False))
+                            else:
+                                size = entry.stat(follow_symlinks=False).st_size
+                                self.remove_file(entry.path, size)
+                        except OSError:
+                            self.error()
+            except OSError:
+                self.error()
+
+
+class CachePurger:
+    """
+    Empties cache folders in a single pass per tree.
+
+    Each file is stat'ed and unlinked on the same visit (no separate walk to
+    measure sizes first) and emptied directories are removed on the way back
+    up. The top-level entries of every cache folder are spread over a thread
+    pool; the cache folders themselves are kept. In dry-run mode nothing is
+    deleted and the result is an estimate of what would be freed.
+
+    `progress_func(bytes_freed, files)` is called a few times a second from
+    the pool threads, and setting `cancel_event` stops the run early.
+    """
+
+    def __init__(self, workers: int = 8):
+        self.workers = workers
+
+    def purge(self, folders, dry_run: bool = False, progress_func=None,
+              cancel_event: threading.Event = None) -> PurgeResult:
+        tasks = []
+        for folder in folders:
+            try:
+                with os.scandir(folder) as entries:
+                    tasks.extend(entry.path for entry in entries)
+            except OSError:
+                continue  # Missing or unreadable cache folder
+
+        job = _PurgeJob(dry_run, progress_func, cancel_event)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(job.purge_entry, tasks))
+
+        job.total.cancelled = job.cancelled
+        if progress_func:
+            progress_func(job.total.bytes_freed, job.total.files)
+        return job.total
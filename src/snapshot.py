@@ -0,0 +1,87 @@
+import hashlib
+import os
+import struct
+from pathlib import Path
+
+_MAGIC = b"DCSNAP1\0"
+# size, mtime_ns, inode, length of the UTF-8 name that follows
+_ENTRY = struct.Struct("<QqQH")
+
+
+class FolderSnapshot:
+    """
+    What the loose files in a folder looked like the last time we watched it.
+
+    Stored as a small binary file of (name, size, mtime, inode) records, one
+    per file directly in the folder. `scan` lists the folder with a single
+    os.scandir and `changes` keeps only the files that are new or different,
+    so catching up after a restart costs one listing plus work for what changed.
+    """
+
+    def __init__(self, folder: Path, snapshot_dir: Path):
+        self.folder = Path(folder)
+        # One file per watched folder, named after its absolute path
+        digest = hashlib.blake2b(str(self.folder.resolve()).encode("utf-8"), digest_size=8).hexdigest()
+        self.path = Path(snapshot_dir) / f"{digest}.snap"
+        self.entries = None  # name -> (size, mtime_ns, inode); None until loaded
+
+    def load(self) -> bool:
+        """Reads the stored snapshot. Returns False if there is none (or it is unreadable)."""
+        try:
+            data = self.path.read_bytes()
+        except OSError:
+            return False
+        if not data.startswith(_MAGIC):
+            return False
+
+        entries = {}
+        offset = len(_MAGIC)
+        try:
+            while offset < len(data):
+                size, mtime_ns, inode, name_len = _ENTRY.unpack_from(data, offset)
+                offset += _ENTRY.size
+                name = data[offset:offset + name_len].decode("utf-8", "surrogateescape")
+                offset += name_len
+                entries[name] = (size, mtime_ns, inode)
+        except struct.error:
+            return False  # Truncated: treat as missing rather than trust half of it
+        self.entries = entries
+        return True
+
+    def scan(self) -> dict:
+        """Lists the folder's loose files in one pass: name -> (size, mtime_ns, inode)."""
+        current = {}
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue  # Vanished while we were listing
+                current[entry.name] = (st.st_size, st.st_mtime_ns, entry.inode())
+        return current
+
+    def changes(self, current: dict) -> list:
+        """Paths in `current` that are not in the snapshot or differ from it."""
+        old = self.entries or {}
+        return [self.folder / name for name, record in current.items() if old.get(name) != record]
+
+    def save(self, current: dict):
+        """Writes `current` as the new snapshot (atomically, so a crash keeps the old one)."""
+        parts = [_MAGIC]
+        for name, (size, mtime_ns, inode) in current.items():
+            raw = name.encode("utf-8", "surrogateescape")
+            if len(raw) > 0xFFFF:
+                continue
+            parts.append(_ENTRY.pack(size, mtime_ns, inode, len(raw)))
+            parts.append(raw)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"".join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.entries = current
@@ -0,0 +1,14 @@
+import os
+from pathlib import Path
+
+
+def app_data_dir() -> Path:
+    """
+    Per-user folder for caches, indexes and journals.
+    Lives outside the watched folder so the watcher never tries to sort it.
+    Override with the DESKTOP_CLEANER_HOME environment variable.
+    """
+    override = os.environ.get("DESKTOP_CLEANER_HOME")
+    folder = Path(override) if override else Path.home() / ".desktop_cleaner"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
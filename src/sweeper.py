@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from src.cleaner import CLUSTERS_FOLDER, DUPLICATES_FOLDER, FileCleaner
+from src.dedup import DedupIndex
+from src.ocr_engine import OCREngine
+from src.probe import FileProbe
+from src.storage import app_data_dir
+
+# Each sweep worker process keeps its own cleaner (and libmagic/Tesseract state)
+_worker_cleaner = None
+# Text sent back to the parent for clustering is cut to this many characters
+_CLUSTER_TEXT_CHARS = 16 * 1024
+
+
+class _DeferredClusters:
+    """
+    Stands in for the ClusterIndex inside sweep workers: it only keeps the
+    text it is asked about. The parent process then clusters the whole
+    batch at once, so the workers never write to the index.
+    """
+
+    def __init__(self):
+        self.text = None
+
+    def assign(self, text: str):
+        self.text = text[:_CLUSTER_TEXT_CHARS] if text else None
+        return None
+
+    def close(self):
+        pass
+
+
+def _init_worker(root_folder: str, clustering: bool = False, dedup_mode: str = None):
+    global _worker_cleaner
+    # The sweep pool is already one process per core, so OCR runs inline here
+    _worker_cleaner = FileCleaner(Path(root_folder), ocr_engine=OCREngine(workers=0), dedup_mode=dedup_mode)
+    if clustering:
+        _worker_cleaner.clusters = _DeferredClusters()
+
+
+def _classify(file_path: str):
+    # Returns (path, category, original, hashes, text); category is None for a duplicate
+    path = Path(file_path)
+    hashes = {}
+    try:
+        probe = FileProbe(path)
+    except OSError:
+        probe = None
+    # Known contents: no need to classify (or OCR) it at all
+    if probe is not None and _worker_cleaner.dedup is not None:
+        original = _worker_cleaner.check_duplicate(path, probe, hashes)
+        if original is not None:
+            return file_path, None, str(original), hashes, None
+
+    clusters = _worker_cleaner.clusters
+    if clusters is not None:
+        clusters.text = None
+    category = _worker_cleaner.identify_category(path, probe)
+    # Text is only collected for files no project keyword claimed
+    return file_path, category, None, hashes, clusters.text if clusters is not None else None
+
+
+def scan_files(root_folder: Path) -> list:
+    """Lists the loose files sitting directly in the root (category folders are left alone)."""
+    files = []
+    with os.scandir(root_folder) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name == "desktop.ini":
+                continue
+            if entry.is_file(follow_symlinks=False):
+                files.append(Path(entry.path))
+    return files
+
+
+class Sweeper:
+    """
+    Cleans a folder that already has files in it, without the GUI or watcher.
+
+    Classification is spread over a process pool and produces a plan of
+    (file, category) pairs; `apply` then performs all the moves in one batch.
+    With `dedup_mode`, the workers spot re-downloads before classifying them.
+    With `clustering`, files no keyword matched are grouped by content in
+    one batched pass over the whole plan.
+    """
+
+    def __init__(self, root_folder: Path, workers: int = None, progress_func=None, dedup_mode: str = None,
+                 clustering: bool = False):
+        self.root_folder = Path(root_folder)
+        self.dedup_mode = dedup_mode
+        self.clustering = clustering
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = progress_func  # Called with (done, total)
+        self._found = {}  # Path -> (original or None, dedup hashes), from the workers for apply
+
+    def plan(self, files: list = None, dry_run: bool = False) -> list:
+        files = scan_files(self.root_folder) if files is None else files
+        total = len(files)
+        plan = []
+        if not total:
+            return plan
+
+        if self.dedup_mode:
+            # Opened once here first, so the workers don't all index the folders at the same time
+            DedupIndex(app_data_dir() / "dedup.sqlite3", self.root_folder).close()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(self.root_folder), self.clustering, self.dedup_mode),
+        ) as pool:
+            chunksize = max(1, min(64, total // (self.workers * 8)))
+            texts = []
+            for done, (file_path, category, original, hashes, text) in enumerate(
+                pool.map(_classify, [str(f) for f in files], chunksize=chunksize), start=1
+            ):
+                file_path = Path(file_path)
+                original = Path(original) if original else None
+                self._found[file_path] = (original, hashes)
+                plan.append((file_path, category or self._duplicate_label(original)))
+                if text:
+                    texts.append((len(plan) - 1, text))
+                if self.progress:
+                    self.progress(done, total)
+
+        if texts:
+            self._cluster(plan, texts, save=not dry_run)
+        return plan
+
+    def _duplicate_label(self, original: Path) -> str:
+        # Where a duplicate ends up, for the printed plan
+        if self.dedup_mode == "move":
+            return DUPLICATES_FOLDER
+        if self.dedup_mode == "skip":
+            return "(duplicate, left in place)"
+        return str(original.parent.relative_to(self.root_folder))
+
+    def _cluster(self, plan: list, texts: list, save: bool = True):
+        from src.clusters import ClusterIndex
+
+        # A dry run previews the groups without teaching the stored index anything
+        index = ClusterIndex(app_data_dir() / "clusters.npz", save_every=None)
+        labels = index.assign_many([text for _, text in texts])
+        if save:
+            index.close()
+        for (position, _), label in zip(texts, labels):
+            if label:
+                plan[position] = (plan[position][0], f"{CLUSTERS_FOLDER}/{label}")
+
+    def apply(self, plan: list) -> int:
+        """Moves every planned file. Returns how many were moved."""
+        cleaner = FileCleaner(self.root_folder, ocr_engine=OCREngine(workers=0), dedup_mode=self.dedup_mode)
+        moved = 0
+        total = len(plan)
+        for done, (file_path, category) in enumerate(plan, start=1):
+            original, hashes = self._found.get(file_path, (None, {}))
+            if original is None and cleaner.dedup is not None:
+                # Checked again here for copies within this batch, which the workers
+                # could not see; their hashes are reused, so nothing is read twice
+                try:
+                    original = cleaner.check_duplicate(file_path, FileProbe(file_path), hashes)
+                except OSError:
+                    pass
+            if original is not None:
+                new_path = cleaner.place_duplicate(file_path, original, hashes)
+            else:
+                new_path = cleaner.place_file(file_path, category, hashes)
+            if new_path:
+                moved += 1
+            if self.progress:
+                self.progress(done, total)
+        return moved
+
+
+class ProgressPrinter:
+    """Prints a single updating progress line, at most a few times per second."""
+
+    def __init__(self, label: str, interval: float = 0.25):
+        self.label = label
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last = 0.0
+
+    def __call__(self, done: int, total: int):
+        now = time.monotonic()
+        if done != total and now - self._last < self.interval:
+            return
+        self._last = now
+        rate = done / max(now - self.started, 1e-6)
+        end = "\n" if done == total else ""
+        print(f"\r{self.label}: {done}/{total} ({rate:.0f} files/s)", end=end, flush=True)
@@ -1,58 +1,230 @@
-import time
+import os
+import threading
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from src.cleaner import FileCleaner
+from src.governor import LoadGovernor
+from src.metrics import METRICS
+from src.mover import _PARTIAL_TAG
+from src.optimizer import StatsSampler
+from src.pipeline import ClassificationPipeline
+from src.snapshot import FolderSnapshot
+from src.storage import app_data_dir
 
 class CleanerHandler(FileSystemEventHandler):
-    def __init__(self, cleaner_instance, logger_func=None):
+    def __init__(self, cleaner_instance, logger_func=None, quiet_period=0.5, governor=None):
         self.cleaner = cleaner_instance
+        self.root = Path(cleaner_instance.root_folder)
         self.logger = logger_func # The Microphone
+        # Waiting, OCR and moving all happen off the watchdog thread
+        self.pipeline = ClassificationPipeline(
+            cleaner_instance, on_moved=self._report_move, quiet_period=quiet_period,
+            governor=governor, on_finished=self._settled,
+        )
+        # Loose files handed to the pipeline that it has not finished with yet;
+        # they are left out of the saved snapshot so the next start retries them
+        self._unsettled = set()
+        self._unsettled_lock = threading.Lock()
+
+    def _is_loose(self, file_path: Path) -> bool:
+        # Only files sitting directly in the root get sorted; the rest is category folders
+        return file_path.parent == self.root
+
+    @staticmethod
+    def _ignored(file_path: Path) -> bool:
+        # Finder metadata, half-written downloads and our own in-progress copies
+        name = file_path.name
+        return name == ".DS_Store" or file_path.suffix == ".tmp" or _PARTIAL_TAG in name
+
+    def _submit(self, file_path: Path) -> bool:
+        with self._unsettled_lock:
+            self._unsettled.add(file_path)
+        # Hand off and return straight away so the observer keeps dispatching
+        if self.pipeline.submit(file_path):
+            return True
+        if self.logger:
+            self.logger(f"⚠️ Busy, skipped: {file_path.name} (queue full)")
+        return False
+
+    def _settled(self, file_path: Path):
+        with self._unsettled_lock:
+            self._unsettled.discard(file_path)
+
+    def unsettled(self) -> set:
+        with self._unsettled_lock:
+            return set(self._unsettled)
+
+    def catch_up(self, snapshot: FolderSnapshot, stop_event: threading.Event = None) -> int:
+        """
+        Queues the loose files that are new or changed since `snapshot` was
+        saved. With no snapshot yet, only records one: files already on the
+        desktop are left for sweep.py, as before.
+        """
+        had_snapshot = snapshot.load()
+        current = snapshot.scan()
+        if not had_snapshot:
+            snapshot.save(current)
+            return 0
+
+        queued = 0
+        for file_path in snapshot.changes(current):
+            if self._ignored(file_path):
+                continue
+            with self._unsettled_lock:
+                self._unsettled.add(file_path)
+            # Wait for room rather than drop: these files get no second event
+            while not self.pipeline.submit(file_path):
+                if stop_event is None or stop_event.wait(0.2):
+                    return queued
+            queued += 1
+        METRICS.inc("catch_up_queued", queued)
+        return queued
 
     def on_modified(self, event):
         if event.is_directory: return
         
         file_path = Path(event.src_path)
-        if file_path.name == ".DS_Store" or file_path.suffix == ".tmp": return
-
-        # Wait for download to finish
-        if self._wait_for_file_ready(file_path):
-            # Move the file
-            new_path = self.cleaner.move_file(file_path)
-            
-            # If successful, speak into the microphone
-            if new_path and self.logger:
-                message = f"✅ Moved: {file_path.name} -> {Path(new_path).parent.name}"
-                self.logger(message)
-
-    def _wait_for_file_ready(self, file_path: Path, retries=5) -> bool:
-        if not file_path.exists(): return False
-        historical_size = -1
-        for _ in range(retries):
-            try:
-                current_size = file_path.stat().st_size
-                if current_size == historical_size and current_size > 0:
-                    return True 
-                historical_size = current_size
-                time.sleep(1) 
-            except OSError:
-                return False
-        return False
+        if not self._is_loose(file_path): return
+        if self._ignored(file_path): return
+        METRICS.inc("fs_events")
+        self._submit(file_path)
+
+    def on_closed(self, event):
+        # inotify IN_CLOSE_WRITE (Linux): the download finished, no need to wait
+        if event.is_directory: return
+
+        file_path = Path(event.src_path)
+        if not self._is_loose(file_path): return
+        if self._ignored(file_path): return
+        self.pipeline.notify_closed(file_path)
+
+    def on_created(self, event):
+        if event.is_directory: return
+
+        file_path = Path(event.src_path)
+        if self._ignored(file_path): return
+        if self._is_loose(file_path):
+            # Some writers create the file in one go with no separate modify event
+            METRICS.inc("fs_events")
+            self._submit(file_path)
+        else:
+            self.cleaner.dest_index.add(file_path)
+
+    def on_deleted(self, event):
+        file_path = Path(event.src_path)
+        if event.is_directory:
+            self.cleaner.dest_index.invalidate(file_path)
+        elif not self._is_loose(file_path):
+            self.cleaner.dest_index.forget(file_path)
+
+    def on_moved(self, event):
+        src_path, dest_path = Path(event.src_path), Path(event.dest_path)
+        if event.is_directory:
+            self.cleaner.dest_index.invalidate(src_path)
+            self.cleaner.dest_index.invalidate(dest_path)
+            return
+        if not self._is_loose(src_path):
+            self.cleaner.dest_index.forget(src_path)
+        if self._is_loose(dest_path):
+            # Renamed into the root, e.g. a browser finishing "file.crdownload"
+            if not self._ignored(dest_path):
+                METRICS.inc("fs_events")
+                self._submit(dest_path)
+        else:
+            # Includes our own moves out of the root: the name is already
+            # reserved in the index, and nothing is queued for a category folder
+            self.cleaner.dest_index.add(dest_path)
+
+    def _report_move(self, file_path: Path, new_path: Path):
+        # If successful, speak into the microphone
+        if self.logger:
+            message = f"✅ Moved: {file_path.name} -> {new_path.parent.name}"
+            self.logger(message)
 
 class DesktopWatcher:
-    def __init__(self, folder_to_watch: Path, logger_func=None):
+    def __init__(self, folder_to_watch: Path, logger_func=None, quiet_period=0.5, throttle_ocr=True,
+                 dedup_mode=None, cleaner=None, clustering=False):
         self.folder_to_watch = folder_to_watch
-        self.cleaner = FileCleaner(folder_to_watch)
+        # A cleaner passed in is reused (its OCR workers and caches stay warm) and
+        # left running on stop; one we build ourselves is shut down with us
+        self._owns_cleaner = cleaner is None
+        if cleaner is None:
+            cleaner = FileCleaner(folder_to_watch, dedup_mode=dedup_mode, clustering=clustering)
+        else:
+            # The folder may have changed while nobody was watching
+            cleaner.dest_index.invalidate(Path(folder_to_watch))
+        self.cleaner = cleaner
+
+        # Back off OCR while the user's machine is busy
+        self.monitor = StatsSampler(interval=1.0, history=60)
+        self.governor = LoadGovernor() if throttle_ocr else None
+        if self.governor:
+            self.monitor.listeners.append(self.governor.on_sample)
+
         # Pass the logger function down to the handler
-        self.event_handler = CleanerHandler(self.cleaner, logger_func)
+        self.event_handler = CleanerHandler(self.cleaner, logger_func, quiet_period, self.governor)
         self.observer = Observer()
 
+        # What the root looked like when we last stopped, to catch up on start
+        self.snapshot = FolderSnapshot(folder_to_watch, app_data_dir() / "snapshots")
+        self.logger = logger_func
+        self._catch_up_stop = threading.Event()
+        self._catch_up_thread = None
+
     def start(self):
         print(f"👀 Watching {self.folder_to_watch} for new files...")
-        self.observer.schedule(self.event_handler, str(self.folder_to_watch), recursive=False)
+        # Finish or roll back moves a crash interrupted before sorting anything new
+        self.cleaner.mover
+        self.event_handler.pipeline.start()
+        if self.governor:
+            self.monitor.start()
+        # Prometheus text for node_exporter, plus an optional local /metrics endpoint
+        METRICS.start_file_export(app_data_dir() / "metrics.prom")
+        port = os.environ.get("DESKTOP_CLEANER_METRICS_PORT")
+        if port:
+            METRICS.serve(int(port))
+        # Recursive so the destination index hears about changes in category folders;
+        # only files directly in the root are ever sorted
+        self.observer.schedule(self.event_handler, str(self.folder_to_watch), recursive=True)
         self.observer.start()
+        # After the observer starts, so nothing slips in between the listing and the events
+        self._catch_up_stop.clear()
+        self._catch_up_thread = threading.Thread(target=self._catch_up, name="catch-up", daemon=True)
+        self._catch_up_thread.start()
+
+    def _catch_up(self):
+        try:
+            queued = self.event_handler.catch_up(self.snapshot, self._catch_up_stop)
+        except OSError as e:
+            print(f"Catch-up skipped: {e}")
+            return
+        if queued and self.logger:
+            self.logger(f"🔄 Catching up: {queued} files changed while stopped")
+
+    def _save_snapshot(self):
+        try:
+            current = self.snapshot.scan()
+            for file_path in self.event_handler.unsettled():
+                current.pop(file_path.name, None)
+            self.snapshot.save(current)
+        except OSError as e:
+            print(f"Could not save folder snapshot: {e}")
 
     def stop(self):
         print("\nStopping watcher...")
         self.observer.stop()
-        self.observer.join()
\ No newline at end of file
+        self.observer.join()
+        if self._catch_up_thread:
+            self._catch_up_stop.set()
+            self._catch_up_thread.join()
+            self._catch_up_thread = None
+        self.monitor.stop()
+        self.event_handler.pipeline.stop()
+        self._save_snapshot()
+        if self._owns_cleaner:
+            self.cleaner.shutdown()
+
+    def stats(self) -> dict:
+        """Queue depth and throughput for each pipeline stage."""
+        return self.event_handler.pipeline.stats()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from src.cleaner import FileCleaner
+from src.clusters import clustering_available
+from src.ocr_engine import OCREngine
+from src.sweeper import ProgressPrinter, Sweeper, scan_files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sort every file already in a folder (no GUI).")
+    parser.add_argument("folder", nargs="?", default=str(Path.home() / "Desktop" / "Cleaner_Test_Zone"),
+                        help="Folder to clean (default: Desktop/Cleaner_Test_Zone)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the plan, move nothing")
+    parser.add_argument("--workers", type=int, default=None, help="Classifier processes (default: all cores)")
+    parser.add_argument("--plan-out", type=Path, default=None, help="Also write the plan as JSON")
+    parser.add_argument("--undo", type=int, metavar="N", default=None,
+                        help="Put the last N moved files back where they came from, then exit")
+    parser.add_argument("--dedup", choices=["skip", "hardlink", "move"], default=None,
+                        help="What to do with files whose contents are already sorted under the folder")
+    parser.add_argument("--cluster", action="store_true",
+                        help="Group files no project keyword matches by similar content (needs numpy)")
+    args = parser.parse_args(argv)
+
+    root = Path(args.folder).expanduser()
+    if not root.is_dir():
+        print(f"Not a folder: {root}")
+        return 1
+
+    if args.undo is not None:
+        cleaner = FileCleaner(root, ocr_engine=OCREngine(workers=0))
+        undone = cleaner.undo_moves(count=args.undo)
+        cleaner.shutdown()
+        print(f"Undo complete: moved {undone} files back.")
+        return 0
+
+    if args.cluster and not clustering_available():
+        print("--cluster needs numpy: pip install numpy")
+        return 1
+
+    files = scan_files(root)
+    print(f"Found {len(files)} files in {root}")
+
+    sweeper = Sweeper(root, workers=args.workers, progress_func=ProgressPrinter("Classifying"),
+                      dedup_mode=args.dedup, clustering=args.cluster)
+    plan = sweeper.plan(files, dry_run=args.dry_run)
+
+    if args.plan_out:
+        args.plan_out.write_text(json.dumps(
+            [{"file": str(f), "category": c} for f, c in plan], indent=2
+        ))
+
+    if args.dry_run:
+        for file_path, category in plan:
+            print(f"{file_path.name}  --->  {category}")
+        print("\n--- PLAN (dry run, nothing moved) ---")
+        for category, count in Counter(c for _, c in plan).most_common():
+            print(f"{count:>7}  {category}")
+        return 0
+
+    sweeper.progress = ProgressPrinter("Moving")
+    moved = sweeper.apply(plan)
+    print(f"Sweep complete: moved {moved} of {len(plan)} files.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
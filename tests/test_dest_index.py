@@ -0,0 +1,77 @@
+import errno
+import os
+
+import pytest
+
+from src.dest_index import DestinationIndex
+
+
+def test_free_name_is_used_as_is(tmp_path):
+    index = DestinationIndex()
+    assert index.allocate(tmp_path / "Documents", "a.txt") == tmp_path / "Documents" / "a.txt"
+
+
+def test_collisions_count_up(tmp_path):
+    (tmp_path / "report.txt").write_text("")
+    (tmp_path / "report(3).txt").write_text("")
+    index = DestinationIndex()
+    assert index.allocate(tmp_path, "report.txt").name == "report(4).txt"
+    assert index.allocate(tmp_path, "report.txt").name == "report(5).txt"
+
+
+def test_names_differing_only_in_case_collide(tmp_path):
+    # One name on macOS and Windows, whose filesystems ignore case
+    (tmp_path / "report.txt").write_text("")
+    (tmp_path / "REPORT(1).TXT").write_text("")
+    index = DestinationIndex()
+    assert index.allocate(tmp_path, "Report.txt").name == "Report(2).txt"
+
+
+def test_rejected_name_is_not_handed_out_again(tmp_path):
+    index = DestinationIndex()
+    first = index.allocate(tmp_path, "a.txt")
+    # Taken on disk in a form the listing does not show
+    index.reject(first)
+    assert index.allocate(tmp_path, "a.txt").name == "a(1).txt"
+
+
+def test_place_file_on_case_insensitive_filesystem(tmp_path, monkeypatch):
+    monkeypatch.setenv("DESKTOP_CLEANER_HOME", str(tmp_path / "state"))
+    link = os.link
+
+    def case_insensitive_link(src, dst, **kwargs):
+        dst = str(dst)
+        folder, name = os.path.split(dst)
+        if any(n.casefold() == name.casefold() for n in os.listdir(folder)):
+            raise FileExistsError(errno.EEXIST, "File exists", dst)
+        return link(src, dst, **kwargs)
+
+    monkeypatch.setattr(os, "link", case_insensitive_link)
+    from src.cleaner import FileCleaner
+
+    root = tmp_path / "Desktop"
+    (root / "Documents" / "Text").mkdir(parents=True)
+    (root / "Documents" / "Text" / "report.txt").write_text("old")
+    (root / "Report.txt").write_text("new")
+
+    cleaner = FileCleaner(root)
+    try:
+        # The index is listed before the file shows up, like a long-running watcher
+        cleaner.dest_index.allocate(root / "Documents" / "Text", "other.txt")
+        (root / "Documents" / "Text" / "rePort(1).txt").write_text("also old")
+        placed = cleaner.place_file(root / "Report.txt", "Documents/Text")
+    finally:
+        cleaner.shutdown()
+
+    assert placed == str(root / "Documents" / "Text" / "Report(2).txt")
+    assert (root / "Documents" / "Text" / "report.txt").read_text() == "old"
+    assert (root / "Documents" / "Text" / "Report(2).txt").read_text() == "new"
+
+
+@pytest.mark.parametrize("name", ["notes.md", ".hidden", "archive.tar.gz"])
+def test_forget_frees_the_name(tmp_path, name):
+    (tmp_path / name).write_text("")
+    index = DestinationIndex()
+    index.allocate(tmp_path, "x")
+    index.forget(tmp_path / name)
+    assert index.allocate(tmp_path, name).name == name
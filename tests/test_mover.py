@@ -0,0 +1,284 @@
+import errno
+import json
+import os
+import time
+
+import pytest
+
+from src import mover
+from src.mover import MoveEngine
+
+
+def write_journal(path, records, tail=b""):
+    with open(path, "wb") as f:
+        for record in records:
+            f.write((json.dumps(record) + "\n").encode("utf-8"))
+        f.write(tail)
+
+
+def begin(move_id, src, dst, tmp=None, t=None):
+    tmp = tmp or dst.with_name(f".{dst.name}{mover._PARTIAL_TAG}{move_id}")
+    return {"op": "begin", "id": move_id, "src": str(src), "dst": str(dst), "tmp": str(tmp),
+            "t": time.time() if t is None else t}
+
+
+def states(engine):
+    return {m["id"]: m["state"] for m in engine._pending(engine.journal.read()).values()}
+
+
+@pytest.fixture
+def desk(tmp_path):
+    root = tmp_path / "Desktop"
+    (root / "Documents").mkdir(parents=True)
+    return root
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return tmp_path / "state" / "moves.journal"
+
+
+@pytest.fixture
+def open_engine(journal):
+    engines = []
+
+    def _open():
+        journal.parent.mkdir(parents=True, exist_ok=True)
+        engines.append(MoveEngine(journal))
+        return engines[-1]
+
+    yield _open
+    for engine in engines:
+        engine.close()
+
+
+# --- Moving ---
+def test_move_is_journaled(desk, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("a")
+    engine = open_engine()
+    engine.move(src, dst)
+    assert not src.exists() and dst.read_text() == "a"
+    assert list(states(engine).values()) == ["done"]
+
+
+def test_move_never_replaces_existing_file(desk, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("new")
+    dst.write_text("old")
+    engine = open_engine()
+    with pytest.raises(FileExistsError):
+        engine.move(src, dst)
+    assert src.read_text() == "new" and dst.read_text() == "old"
+    assert list(states(engine).values()) == ["abort"]
+
+
+def test_cross_device_move_never_replaces_existing_file(desk, open_engine, monkeypatch):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("new")
+    dst.write_text("old")
+    publish = mover._publish
+
+    def no_rename_across(a, b):
+        if a == src:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return publish(a, b)
+
+    monkeypatch.setattr(mover, "_publish", no_rename_across)
+    engine = open_engine()
+    with pytest.raises(FileExistsError):
+        engine.move(src, dst)
+    assert src.read_text() == "new" and dst.read_text() == "old"
+    assert not [p for p in dst.parent.iterdir() if mover._PARTIAL_TAG in p.name]
+
+
+# --- Crash recovery ---
+def test_recover_begin_before_rename_rolls_back(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("a")
+    record = begin("1", src, dst)
+    partial = desk / "Documents" / os.path.basename(record["tmp"])
+    partial.write_text("half")  # Crashed mid-copy
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [record])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "abort"}
+    assert src.read_text() == "a"
+    assert not dst.exists() and not partial.exists()
+
+
+def test_recover_begin_after_rename_rolls_forward(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    dst.write_text("a")
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [begin("1", src, dst)])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "done"}
+    assert dst.read_text() == "a"
+
+
+def test_recover_begin_between_link_and_unlink(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("a")
+    os.link(src, dst)  # New name made, old one not removed yet
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [begin("1", src, dst)])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "done"}
+    assert not src.exists() and dst.read_text() == "a"
+
+
+def test_recover_copied_publishes_the_copy(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("a")
+    record = begin("1", src, dst)
+    tmp = desk / "Documents" / os.path.basename(record["tmp"])
+    tmp.write_text("a")
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [record, {"op": "copied", "id": "1"}])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "done"}
+    assert dst.read_text() == "a"
+    assert not src.exists() and not tmp.exists()
+
+
+def test_recover_copied_keeps_source_if_name_was_taken(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("a")
+    dst.write_text("someone else's")
+    record = begin("1", src, dst)
+    tmp = desk / "Documents" / os.path.basename(record["tmp"])
+    tmp.write_text("a")
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [record, {"op": "copied", "id": "1"}])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "abort"}
+    assert src.read_text() == "a" and dst.read_text() == "someone else's"
+    assert not tmp.exists()
+
+
+def test_recover_leaves_aborted_moves_alone(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    src.write_text("a")
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [begin("1", src, dst), {"op": "abort", "id": "1"}])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "abort"}
+    assert len(engine.journal.read()) == 2  # Nothing new recorded
+    assert src.read_text() == "a" and not dst.exists()
+
+
+def test_torn_journal_tail_is_cut_off(desk, journal, open_engine):
+    src, dst = desk / "a.txt", desk / "Documents" / "a.txt"
+    dst.write_text("a")
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [begin("1", src, dst), {"op": "done", "id": "1"}],
+                  tail=b'{"op":"begin","id":"2","src":"/x')
+
+    engine = open_engine()
+    assert journal.read_bytes().endswith(b"\n")
+    assert states(engine) == {"1": "done"}
+
+    # New records start on a clean line
+    other = desk / "b.txt"
+    other.write_text("b")
+    engine.move(other, desk / "Documents" / "b.txt")
+    assert len(states(engine)) == 2
+
+
+# --- Undo ---
+def test_undo_puts_files_back(desk, open_engine):
+    engine = open_engine()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (desk / name).write_text(name)
+        engine.move(desk / name, desk / "Documents" / name)
+
+    assert engine.undo(count=2) == 2
+    assert sorted(p.name for p in desk.glob("*.txt")) == ["b.txt", "c.txt"]
+    assert [p.name for p in (desk / "Documents").iterdir()] == ["a.txt"]
+    # Undone moves are not offered again
+    assert [m["dst"] for m in engine.history()] == [str(desk / "Documents" / "a.txt")]
+
+
+def test_undo_skips_files_whose_old_name_is_taken(desk, open_engine):
+    engine = open_engine()
+    (desk / "a.txt").write_text("a")
+    engine.move(desk / "a.txt", desk / "Documents" / "a.txt")
+    (desk / "a.txt").write_text("new download")
+
+    assert engine.undo() == 0
+    assert (desk / "a.txt").read_text() == "new download"
+    assert (desk / "Documents" / "a.txt").read_text() == "a"
+
+
+def test_undo_only_touches_the_given_root(tmp_path, desk, open_engine):
+    other = tmp_path / "Downloads"
+    (other / "Documents").mkdir(parents=True)
+    engine = open_engine()
+    for root in (desk, other):
+        (root / "a.txt").write_text(root.name)
+        engine.move(root / "a.txt", root / "Documents" / "a.txt")
+
+    assert engine.undo(root=desk) == 1
+    assert (desk / "a.txt").read_text() == "Desktop"
+    assert (other / "Documents" / "a.txt").exists()
+
+
+# --- Linked duplicates ---
+def test_link_replaces_duplicate_and_undo_restores_a_copy(desk, open_engine):
+    original = desk / "Documents" / "a.txt"
+    original.write_text("same")
+    dup = desk / "a copy.txt"
+    dup.write_text("same")
+    engine = open_engine()
+
+    linked = engine.link(dup, original, desk / "Documents" / "a copy.txt")
+    assert not dup.exists()
+    assert os.path.samefile(linked, original)
+
+    assert engine.undo() == 1
+    assert dup.read_text() == "same" and not linked.exists()
+    # A separate file again: editing it must not change the original
+    assert not os.path.samefile(dup, original)
+
+
+def test_link_leaves_everything_if_duplicate_cannot_be_removed(desk, open_engine, monkeypatch):
+    original = desk / "Documents" / "a.txt"
+    original.write_text("same")
+    dup = desk / "a copy.txt"
+    dup.write_text("same")
+    target = desk / "Documents" / "a copy.txt"
+    unlink = os.unlink
+
+    def locked(path, *args, **kwargs):
+        if str(path) == str(dup):
+            raise PermissionError(errno.EACCES, "in use", str(path))
+        return unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "unlink", locked)
+    engine = open_engine()
+    with pytest.raises(PermissionError):
+        engine.link(dup, original, target)
+    assert dup.exists() and not target.exists()
+    assert list(states(engine).values()) == ["abort"]
+
+
+def test_recover_link_before_duplicate_removed_rolls_back(desk, journal, open_engine):
+    original = desk / "Documents" / "a.txt"
+    original.write_text("same")
+    dup = desk / "a copy.txt"
+    dup.write_text("same")
+    target = desk / "Documents" / "a copy.txt"
+    os.link(original, target)
+    journal.parent.mkdir(parents=True)
+    write_journal(journal, [dict(begin("1", dup, target), link=str(original))])
+
+    engine = open_engine()
+    assert states(engine) == {"1": "abort"}
+    assert dup.read_text() == "same" and not target.exists()
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from src.pipeline import ClassificationPipeline
+
+
+class SlowCleaner:
+    """Stands in for FileCleaner: every file takes a while to classify, like OCR."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.started = threading.Event()
+        self.placed = []
+
+    def check_duplicate(self, file_path, probe, hashes=None):
+        return None
+
+    def wants_content_scan(self, file_path, probe):
+        return True
+
+    def identify_category(self, file_path, probe=None):
+        self.started.set()
+        time.sleep(self.delay)
+        return "Misc"
+
+    def place_file(self, file_path, category, hashes=None):
+        self.placed.append(file_path)
+        return str(file_path)
+
+
+def test_stop_drops_queued_files_instead_of_classifying_them(tmp_path):
+    cleaner = SlowCleaner(delay=0.2)
+    finished = []
+    pipeline = ClassificationPipeline(cleaner, quiet_period=0.01, classify_workers=1,
+                                      on_finished=finished.append)
+    pipeline.start()
+    paths = []
+    for i in range(30):
+        path = tmp_path / f"scan{i}.png"
+        path.write_bytes(b"x")
+        paths.append(path)
+        pipeline.notify_closed(path)
+    assert cleaner.started.wait(5)
+    time.sleep(0.1)  # Let the debouncer hand the rest over
+
+    began = time.monotonic()
+    pipeline.stop()
+    assert time.monotonic() - began < 1.0
+
+    # Only the file being worked on finished; the rest are left for the next start
+    assert len(finished) <= 2
+    assert set(finished) == set(cleaner.placed)
+    assert not pipeline._in_flight